@@ -28,7 +28,7 @@ from dashboard_components import (
 )
 
 
-from currency_service import get_conversion_rate, refresh_rates
+from currency_service import get_conversion_rate, refresh_rates, load_cache
 from config import INVESTMENT_ACCOUNTS, INVESTMENT_CATEGORIES
 import time
 import base64
@@ -251,20 +251,42 @@ if st.session_state.show_loading:
     st.session_state.animation_complete = True
 
 # Load data
-df = load_data()
-if df is not None and not df.empty:
+DATA_FILE = 'investment_data.csv'
+
+def _data_mtime():
+    try:
+        return os.path.getmtime(DATA_FILE)
+    except OSError:
+        return 0.0
+
+@st.cache_data(show_spinner=False)
+def _cached_load(mtime):
+    # mtime is only part of the cache key - saving the data file forces a reload
+    raw = load_data(DATA_FILE)
+    if raw is None or raw.empty:
+        return raw
+    
     # Ensure Date column is datetime - using a more flexible approach
-    df['Date'] = pd.to_datetime(df['Date'], format='mixed', dayfirst=False)
+    raw['Date'] = pd.to_datetime(raw['Date'], format='mixed', dayfirst=False)
     
     # Ensure Investment column contains only strings
-    df['Investment'] = df['Investment'].astype(str)
-    
-    # Add helper columns
-    df['ValueUSD'] = df.apply(
-        lambda row: row['Value'] * get_conversion_rate(row['Currency']), 
-        axis=1
-    )
+    raw['Investment'] = raw['Investment'].astype(str)
+    return raw
+
+@st.cache_data(show_spinner=False)
+def _attach_value_usd(mtime, rates_frozen):
+    # rates_frozen is only part of the cache key - refreshed rates recompute ValueUSD
+    raw = _cached_load(mtime)
+    if raw is None or raw.empty:
+        return raw
     
+    # Add helper columns - one rate lookup per currency instead of per row
+    rate_dict = {curr: get_conversion_rate(curr) for curr in raw['Currency'].unique()}
+    raw['ValueUSD'] = raw['Value'].to_numpy() * raw['Currency'].map(rate_dict).to_numpy()
+    return raw
+
+df = _attach_value_usd(_data_mtime(), tuple(sorted(load_cache().get('rates', {}).items())))
+if df is not None and not df.empty:
     # Get latest date
     latest_date = df['Date'].max()
     earliest_date = df['Date'].min()
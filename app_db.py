@@ -16,7 +16,8 @@ from data_handler_db import (
     get_portfolio_snapshot_db,
     migrate_from_csv,
     get_sustainability_history_db,
-    backfill_sustainability
+    backfill_sustainability,
+    DB_FILE
 )
 
 
@@ -34,7 +35,7 @@ from dashboard_components import (
 )
 
 
-from currency_service import get_conversion_rate, refresh_rates
+from currency_service import refresh_rates
 from config import INVESTMENT_ACCOUNTS, INVESTMENT_CATEGORIES
 from auto_sync import sync_to_github
 import time
@@ -42,6 +43,7 @@ import base64
 import os
 import sqlite3
 from io import BytesIO
+from functools import partial
 
 from utils import (
     svg_to_base64,
@@ -273,12 +275,8 @@ if df is not None and not df.empty:
     # Ensure Investment column contains only strings
     df['Investment'] = df['Investment'].astype(str)
     
-    # Add helper columns
-    df['ValueUSD'] = df.apply(
-        lambda row: row['Value'] * get_conversion_rate(row['Currency']), 
-        axis=1
-    )
-    
+    # ValueUSD is materialized in the database by load_data()
+
     # Get latest date
     latest_date = df['Date'].max()
     earliest_date = df['Date'].min()
@@ -297,6 +295,77 @@ investment_accounts = {str(k): v for k, v in INVESTMENT_ACCOUNTS.items()}
 def reset_success():
     st.session_state.show_success = False
 
+# Changes on every committed write to the database, from any session
+def _db_mtime():
+    try:
+        return os.path.getmtime(DB_FILE)
+    except OSError:
+        return 0.0
+
+@st.cache_data(show_spinner=False)
+def _sustainability_history(start_dt, end_dt, db_mtime):
+    # db_mtime is only part of the cache key - any write to the database forces a reload
+    return get_sustainability_history_db(start_dt, end_dt)
+
+# Download buttons that build their file only when clicked. Streamlit 1.52+ accepts a
+# callable for data and runs it on click; older versions need the bytes up front
+_CALLABLE_DOWNLOAD_DATA = tuple(int(part) for part in st.__version__.split('.')[:2]) >= (1, 52)
+
+def _download_button(build, **kwargs):
+    return st.download_button(data=build if _CALLABLE_DOWNLOAD_DATA else build(), **kwargs)
+
+# Fragments rerun on their own without re-executing the whole page (Streamlit 1.33+)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# Exchange rate table and refresh buttons; a full app rerun happens only after rates change
+@_fragment
+def _rates_panel():
+    # Load current exchange rates
+    from currency_service import get_all_rates, load_cache
+    
+    cache = load_cache()
+    
+    # Display last update time
+    last_updated = cache.get('last_updated', 'Never')
+    st.write(f"Exchange rates last updated: {last_updated}")
+    
+    # Display current rates
+    if 'rates' in cache and cache['rates']:
+        # Rates are stored sorted by currency, no need to sort here
+        rates_df = (
+            pd.Series(cache['rates'], name='Rate to USD')
+            .rename_axis('Currency')
+            .reset_index()
+        )
+        
+        st.dataframe(
+            rates_df,
+            use_container_width=True,
+            hide_index=True
+        )
+        
+        # Add refresh button
+        if st.button(f"{ICONS['refresh']} Force Refresh Exchange Rates", key="force_refresh", use_container_width=True):
+            with st.spinner("Refreshing exchange rates..."):
+                # refresh_rates() returns only after the cache file is written
+                refreshed = refresh_rates()
+            if refreshed:
+                st.success(f"{ICONS['success']} Exchange rates refreshed successfully!")
+                st.rerun()
+            else:
+                st.error(f"{ICONS['error']} Could not refresh exchange rates. Check your API key and connection.")
+    else:
+        st.warning(f"{ICONS['warning']} No exchange rates found. Click refresh to fetch current rates.")
+        
+        if st.button(f"{ICONS['refresh']} Fetch Exchange Rates", key="fetch_rates", use_container_width=True):
+            with st.spinner("Fetching exchange rates..."):
+                fetched = refresh_rates()
+            if fetched:
+                st.success(f"{ICONS['success']} Exchange rates fetched successfully!")
+                st.rerun()
+            else:
+                st.error(f"{ICONS['error']} Could not fetch exchange rates. Check your API key and connection.")
+
 # Reusable renderer for Sustainability: Income vs Expenses vs Delta
 def render_sustainability_section(start_dt, end_dt, key_prefix="sust_dash"):
     st.subheader("Sustainability: Income vs Expenses vs Delta")
@@ -309,7 +378,7 @@ def render_sustainability_section(start_dt, end_dt, key_prefix="sust_dash"):
         _start_dt = pd.to_datetime(df["Date"].min()) if not df.empty else pd.Timestamp.today() - pd.Timedelta(days=30)
         _end_dt = pd.to_datetime(df["Date"].max()) if not df.empty else pd.Timestamp.today()
 
-    sust_df = get_sustainability_history_db(_start_dt, _end_dt)
+    sust_df = _sustainability_history(_start_dt, _end_dt, _db_mtime())
     if sust_df is None or sust_df.empty:
         st.info(f"{ICONS['info']} No sustainability data yet for this range. It will populate automatically as you add/update entries.")
         return
@@ -2117,13 +2186,16 @@ Date,Investment,Currency,Value
                     st.error(f"Error optimizing database: {e}")
             
             # Option to export data to CSV for backup
-            if st.button("Export Database to CSV", use_container_width=True):
-                try:
-                    csv_filename = f"investment_data_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-                    df.to_csv(csv_filename, index=False)
-                    st.success(f"Data exported to {csv_filename}")
-                except Exception as e:
-                    st.error(f"Error exporting data to CSV: {e}")
+            # Serialized in memory and sent to the browser - nothing is written to the server disk
+            csv_filename = f"investment_data_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            _download_button(
+                partial(df.to_csv, index=False),
+                label=f"{ICONS['download']} Export Database to CSV",
+                file_name=csv_filename,
+                mime="text/csv",
+                use_container_width=True,
+                key="export_db_csv"
+            )
             
             # Option to reset the database (with confirmation)
             reset_db = st.checkbox("I understand this will delete all data", key="reset_confirm")
@@ -2146,47 +2218,7 @@ Date,Investment,Currency,Value
         st.markdown("---")
         st.subheader("Exchange Rate Settings")
         
-        # Load current exchange rates
-        from currency_service import get_all_rates, load_cache
-        
-        cache = load_cache()
-        
-        # Display last update time
-        last_updated = cache.get('last_updated', 'Never')
-        st.write(f"Exchange rates last updated: {last_updated}")
-        
-        # Display current rates
-        if 'rates' in cache and cache['rates']:
-            rates_df = pd.DataFrame({
-                'Currency': list(cache['rates'].keys()),
-                'Rate to USD': list(cache['rates'].values())
-            })
-            
-            # Sort by currency
-            rates_df = rates_df.sort_values('Currency')
-            
-            st.dataframe(
-                rates_df,
-                use_container_width=True,
-                hide_index=True
-            )
-            
-            # Add refresh button
-            if st.button(f"{ICONS['refresh']} Force Refresh Exchange Rates", key="force_refresh", use_container_width=True):
-                with st.spinner("Refreshing exchange rates..."):
-                    refresh_rates()
-                    time.sleep(0.5)  # Wait for refresh to complete
-                    st.success(f"{ICONS['success']} Exchange rates refreshed successfully!")
-                    st.rerun()
-        else:
-            st.warning(f"{ICONS['warning']} No exchange rates found. Click refresh to fetch current rates.")
-            
-            if st.button(f"{ICONS['refresh']} Fetch Exchange Rates", key="fetch_rates", use_container_width=True):
-                with st.spinner("Fetching exchange rates..."):
-                    refresh_rates()
-                    time.sleep(0.5)  # Wait for refresh to complete
-                    st.success(f"{ICONS['success']} Exchange rates fetched successfully!")
-                    st.rerun()
+        _rates_panel()
 
 # app_db.py (Part 29: Settings Tab - Final Parts)
 
@@ -2225,13 +2257,6 @@ try:
         if st.button("Recalculate sustainability from history", key="backfill_sust"):
             with st.spinner("Backfilling sustainability from history…"):
                 ok = backfill_sustainability()
-                try:
-                    if hasattr(st, "cache_data"):
-                        st.cache_data.clear()
-                    if hasattr(st, "cache_resource"):
-                        st.cache_resource.clear()
-                except Exception:
-                    pass
 
             if ok:
                 st.success("Backfill complete. If charts don’t update automatically, change the date range or refresh.")
@@ -17,14 +17,17 @@ st.set_page_config(
 )
 
 # Initialize database from snapshot if needed (for cloud deployment)
-try:
-    import init_database
-    init_database.init_database_from_snapshot()
-except Exception as e:
-    st.error(f"❌ Database initialization error: {e}")
-    st.code(traceback.format_exc())
-    sys.stderr.write(f"INIT ERROR: {e}\n")
-    traceback.print_exc(file=sys.stderr)
+# Checked once per session, so a reset flag or new snapshot is picked up by the next session
+if not st.session_state.get('db_initialized'):
+    try:
+        import init_database
+        init_database.init_database_from_snapshot()
+        st.session_state['db_initialized'] = True
+    except Exception as e:
+        st.error(f"❌ Database initialization error: {e}")
+        st.code(traceback.format_exc())
+        sys.stderr.write(f"INIT ERROR: {e}\n")
+        traceback.print_exc(file=sys.stderr)
 
 # Authentication
 try:
@@ -39,38 +42,56 @@ except Exception as e:
     traceback.print_exc(file=sys.stderr)
     st.stop()
 
+# Locates the st.set_page_config( call in app_db.py
+_PAGE_CONFIG_CALL = re.compile(r'st\.set_page_config\s*\(')
+
+def _strip_page_config(app_code):
+    """
+    Remove the st.set_page_config(...) call from the app source.
+    Scans forward from the call counting balanced parentheses, skipping
+    string literals, so arguments like page_icon=")" are handled.
+    Line numbers are preserved for tracebacks.
+    """
+    match = _PAGE_CONFIG_CALL.search(app_code)
+    if not match:
+        return app_code
+
+    depth = 1
+    quote = None
+    i = match.end()
+    while i < len(app_code) and depth:
+        ch = app_code[i]
+        if quote:
+            if ch == '\\':
+                i += 1
+            elif ch == quote:
+                quote = None
+        elif ch in ('"', "'"):
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        i += 1
+
+    removed_lines = app_code.count('\n', match.start(), i)
+    return app_code[:match.start()] + '# set_page_config already called in wrapper' + '\n' * removed_lines + app_code[i:]
+
+@st.cache_resource(show_spinner=False)
+def _load_app_code(app_db_path, mtime):
+    """Read, clean and compile app_db.py once per file version (mtime is the cache key)."""
+    with open(app_db_path, 'r', encoding='utf-8') as f:
+        app_code = f.read()
+    return compile(_strip_page_config(app_code), app_db_path, 'exec')
+
 # Main app with error handling
 # CRITICAL FIX: Read and execute app_db.py code instead of importing
 # This prevents the duplicate st.set_page_config() error
 try:
     app_db_path = os.path.join(os.path.dirname(__file__) or '.', 'app_db.py')
 
-    with open(app_db_path, 'r', encoding='utf-8') as f:
-        app_code = f.read()
-
     # Remove the entire st.set_page_config block (including multiline params)
-    # Using a more robust approach: find the call and count parentheses
-    lines = app_code.split('\n')
-    new_lines = []
-    in_config = False
-    paren_count = 0
-
-    for line in lines:
-        if 'st.set_page_config' in line and not in_config:
-            in_config = True
-            paren_count = line.count('(') - line.count(')')
-            new_lines.append('# set_page_config already called in wrapper')
-            if paren_count <= 0:
-                in_config = False
-        elif in_config:
-            paren_count += line.count('(') - line.count(')')
-            # Skip this line (it's part of set_page_config)
-            if paren_count <= 0:
-                in_config = False
-        else:
-            new_lines.append(line)
-
-    app_code = '\n'.join(new_lines)
+    app_code = _load_app_code(app_db_path, os.path.getmtime(app_db_path))
 
     # Execute the app code in the current namespace
     exec(app_code, globals())
@@ -6,13 +6,16 @@ import sys
 import traceback
 
 # Initialize database from snapshot if needed
-try:
-    import init_database
-    init_database.init_database_from_snapshot()
-except Exception as e:
-    st.error(f"Database initialization error: {e}")
-    sys.stderr.write(f"INIT ERROR: {e}\n")
-    traceback.print_exc(file=sys.stderr)
+# Checked once per session, so a reset flag or new snapshot is picked up by the next session
+if not st.session_state.get('db_initialized'):
+    try:
+        import init_database
+        init_database.init_database_from_snapshot()
+        st.session_state['db_initialized'] = True
+    except Exception as e:
+        st.error(f"Database initialization error: {e}")
+        sys.stderr.write(f"INIT ERROR: {e}\n")
+        traceback.print_exc(file=sys.stderr)
 
 # Authentication
 try:
@@ -1,9 +1,12 @@
 # app_diagnostic.py - Test each component individually
 
 import streamlit as st
+import numpy as np
 import sys
 import traceback
 
+from currency_service import get_conversion_rate
+
 # Initialize database
 try:
     import init_database
@@ -22,11 +25,25 @@ except Exception as e:
 
 st.title("🔍 Investment Tracker - Component Diagnostic")
 
+# Cache the SQLite read so reruns don't re-query the database
+@st.cache_data(show_spinner=False)
+def _load_data():
+    from data_handler_db import load_data
+    return load_data()
+
+# Streamlit reruns the whole script on every interaction - only run the tests once per session
+if st.session_state.get('diag_done'):
+    st.info("Diagnostic already completed in this session.")
+    if st.button("Run diagnostic again"):
+        st.session_state['diag_done'] = False
+        _load_data.clear()
+        st.rerun()
+    st.stop()
+
 # Test 1: Data Loading
 st.header("Test 1: Data Loading")
 try:
-    from data_handler_db import load_data
-    df = load_data()
+    df = _load_data()
     st.success(f"✅ Loaded {len(df)} records")
     st.write(f"Columns: {list(df.columns)}")
 except Exception as e:
@@ -37,10 +54,10 @@ except Exception as e:
 # Test 2: Date Range Filtering
 st.header("Test 2: Date Range Filtering")
 try:
-    from datetime import timedelta
+    from utils import filter_date_range
     end_date = df['Date'].max()
-    start_date = end_date - timedelta(days=30)
-    filtered = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
+    start_date = end_date - np.timedelta64(30, 'D')
+    filtered = filter_date_range(df, start_date, end_date).copy()
     st.success(f"✅ Filtered to {len(filtered)} records")
 except Exception as e:
     st.error(f"❌ Filtering failed: {e}")
@@ -50,7 +67,6 @@ except Exception as e:
 # Test 3: Currency Conversion
 st.header("Test 3: Currency Conversion")
 try:
-    from currency_service import get_conversion_rate
     rate = get_conversion_rate('USD')
     st.success(f"✅ Currency service works (USD rate: {rate})")
     
@@ -88,7 +104,6 @@ try:
 
     # Ensure filtered dataframe has ValueUSD column
     if 'ValueUSD' not in filtered.columns:
-        from currency_service import get_conversion_rate
         filtered['ValueUSD'] = filtered.apply(lambda row: row['Value'] * get_conversion_rate(row['Currency']), axis=1)
 
     daily_totals = filtered.groupby('Date')['ValueUSD'].sum().reset_index()
@@ -100,3 +115,4 @@ except Exception as e:
     st.code(traceback.format_exc())
 
 st.success("🎉 Diagnostic complete!")
+st.session_state['diag_done'] = True
@@ -3,6 +3,7 @@ import streamlit as st # type: ignore
 import pandas as pd # type: ignore
 import plotly.express as px # type: ignore
 import plotly.graph_objects as go # type: ignore
+import plotly.io as pio # type: ignore
 from datetime import datetime, timedelta
 import numpy as np # type: ignore
 from data_handler import (
@@ -14,13 +15,16 @@ from data_handler import (
     get_relative_performance,
     get_previous_values
 )
-from currency_service import get_conversion_rate, refresh_rates
+from currency_service import get_conversion_rate, refresh_rates, load_cache
 from config import INVESTMENT_ACCOUNTS, INVESTMENT_CATEGORIES
-import time
+from utils import downsample_lttb, dataframe_to_excel
 import base64
+import json
 import os
+from functools import lru_cache, partial
 
-# Function to encode SVG images for embedding
+# Function to encode SVG images for embedding (memoized - the files don't change while running)
+@lru_cache(maxsize=None)
 def svg_to_base64(file_path):
     try:
         with open(file_path, "rb") as image_file:
@@ -45,46 +49,43 @@ os.makedirs("icons/filters", exist_ok=True)
 os.makedirs("icons/categories", exist_ok=True)
 os.makedirs("icons/status", exist_ok=True)
 
-
-# Initialize icons
-ICONS = {
-    # Tab icons
-    "dashboard": get_icon("icons/tabs/dashboard.svg", "📊", width=32, height=32),
-    "performance": get_icon("icons/tabs/performance.svg", "📈", width=32, height=32),
-    "data": get_icon("icons/tabs/data.svg", "📋", width=32, height=32),
-    "settings": get_icon("icons/tabs/settings.svg", "⚙️", width=32, height=32),
+# Initialize icons once per server process rather than on every rerun
+@st.cache_resource(show_spinner=False)
+def _build_icons():
+    return {
+        # Tab icons
+        "dashboard": get_icon("icons/tabs/dashboard.svg", "📊", width=32, height=32),
+        "performance": get_icon("icons/tabs/performance.svg", "📈", width=32, height=32),
+        "data": get_icon("icons/tabs/data.svg", "📋", width=32, height=32),
+        "settings": get_icon("icons/tabs/settings.svg", "⚙️", width=32, height=32),
     
-    # Action icons
-    "add_entry": get_icon("icons/actions/add_entry.svg", "💾"),
-    "bulk_update": get_icon("icons/actions/bulk_update.svg", "💾"),
-    "update_all": get_icon("icons/actions/update_all.svg", "💾"),
-    "refresh": get_icon("icons/actions/refresh.svg", "🔄"),
-    "download": get_icon("icons/actions/download.svg", "📥"),
-    "save": get_icon("icons/actions/save.svg", "💾"),
-    "import": get_icon("icons/actions/import.svg", "📤"),
-    "export": get_icon("icons/actions/export.svg", "📥"),
+        # Action icons
+        "add_entry": get_icon("icons/actions/add_entry.svg", "💾"),
+        "bulk_update": get_icon("icons/actions/bulk_update.svg", "💾"),
+        "update_all": get_icon("icons/actions/update_all.svg", "💾"),
+        "refresh": get_icon("icons/actions/refresh.svg", "🔄"),
+        "download": get_icon("icons/actions/download.svg", "📥"),
+        "save": get_icon("icons/actions/save.svg", "💾"),
+        "import": get_icon("icons/actions/import.svg", "📤"),
+        "export": get_icon("icons/actions/export.svg", "📥"),
     
-    # Filter icons
-    "search": get_icon("icons/filters/search.svg", "🔍"),
-    "sort": get_icon("icons/filters/sort.svg", "↕️"),
-    "filter": get_icon("icons/filters/filter.svg", "📋"),
+        # Filter icons
+        "search": get_icon("icons/filters/search.svg", "🔍"),
+        "sort": get_icon("icons/filters/sort.svg", "↕️"),
+        "filter": get_icon("icons/filters/filter.svg", "📋"),
     
-    # Category icons
-    "folder": get_icon("icons/categories/folder.svg", "📁"),
+        # Category icons
+        "folder": get_icon("icons/categories/folder.svg", "📁"),
     
-    # Status icons
-    "info": get_icon("icons/status/info.svg", "ℹ️"),
-    "success": get_icon("icons/status/success.svg", "✅"),
-    "warning": get_icon("icons/status/warning.svg", "⚠️"),
-    "error": get_icon("icons/status/error.svg", "❌"),
-}
+        # Status icons
+        "info": get_icon("icons/status/info.svg", "ℹ️"),
+        "success": get_icon("icons/status/success.svg", "✅"),
+        "warning": get_icon("icons/status/warning.svg", "⚠️"),
+        "error": get_icon("icons/status/error.svg", "❌"),
+    }
+
+ICONS = _build_icons()
 
-# Ensure icon directory exists
-os.makedirs("icons/tabs", exist_ok=True)
-os.makedirs("icons/actions", exist_ok=True)
-os.makedirs("icons/filters", exist_ok=True)
-os.makedirs("icons/categories", exist_ok=True)
-os.makedirs("icons/status", exist_ok=True)
 
 # Page configuration
 st.set_page_config(
@@ -174,15 +175,6 @@ Track your investments across multiple currencies, analyze performance, and visu
 """)
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Progress animation function for loading data
-def load_with_animation():
-    progress_bar = st.progress(0)
-    for i in range(101):
-        # Update progress bar
-        progress_bar.progress(i)
-        time.sleep(0.01)  # Small delay for animation effect
-    return
-
 # Initialize session state for holding our application state
 if 'show_success' not in st.session_state:
     st.session_state.show_success = False
@@ -192,37 +184,359 @@ if 'filtered_df' not in st.session_state:
     st.session_state.filtered_df = None
 if 'last_refresh' not in st.session_state:
     st.session_state.last_refresh = datetime.now()
-if 'show_loading' not in st.session_state:
-    st.session_state.show_loading = True
-if 'animation_complete' not in st.session_state:
-    st.session_state.animation_complete = False
-
-# Animated loading of data
-if st.session_state.show_loading:
-    with st.spinner("Loading your investment data..."):
-        load_with_animation()
-    st.session_state.show_loading = False
-    st.session_state.animation_complete = True# Load data
-df = load_data()
-if df is not None and not df.empty:
+if 'data_version' not in st.session_state:
+    st.session_state.data_version = 0
+
+# Load data
+DATA_FILE = 'investment_data.csv'
+
+def _data_mtime():
+    try:
+        return os.path.getmtime(DATA_FILE)
+    except OSError:
+        return 0.0
+
+def _rate_epoch():
+    # Changes whenever the exchange rate cache is rewritten, from any session
+    return load_cache().get('timestamp', 0)
+
+@st.cache_data(show_spinner=False)
+def _rate_series(currencies, rate_epoch):
+    # rate_epoch is only part of the cache key - one lookup per currency per refresh
+    return pd.Series({curr: get_conversion_rate(curr) for curr in currencies}, dtype=float)
+
+@st.cache_data(show_spinner=False)
+def _prepared_df(mtime, rate_epoch):
+    # mtime and rate_epoch are only part of the cache key - saving the data file
+    # or refreshing the rates forces a reload
+    raw = load_data(DATA_FILE)
+    if raw is None or raw.empty:
+        return raw
+    
     # Ensure Date column is datetime - using a more flexible approach
-    df['Date'] = pd.to_datetime(df['Date'], format='mixed', dayfirst=False)
+    raw['Date'] = pd.to_datetime(raw['Date'], format='mixed', dayfirst=False)
+    
+    # Sort once here (stable, so same-day rows keep file order); everything below relies on it
+    raw = raw.sort_values('Date', kind='mergesort').reset_index(drop=True)
     
     # Ensure Investment column contains only strings
-    df['Investment'] = df['Investment'].astype(str)
+    raw['Investment'] = raw['Investment'].astype(str)
+    
+    # Add helper columns - one rate lookup per currency instead of per row
+    rates = _rate_series(tuple(sorted(raw['Currency'].unique())), rate_epoch)
+    raw['ValueUSD'] = raw['Value'].to_numpy() * raw['Currency'].map(rates).to_numpy()
+    
+    # Few distinct names and many rows: categoricals let groupbys hash integer codes
+    raw['Investment'] = raw['Investment'].astype('category')
+    raw['Currency'] = raw['Currency'].astype('category')
+    return raw
+
+# Dashboard aggregates, keyed on the data file and the session's data version
+@st.cache_data(show_spinner=False)
+def _dashboard_artifacts(mtime, rate_epoch, data_version):
+    # The arguments are only part of the cache key
+    df = _prepared_df(mtime, rate_epoch)
+    latest_date = df['Date'].iloc[-1]
+    
+    # Index snapshots by date so period lookups are binary searches (df is date-sorted,
+    # so first-appearance order from sort=False is already ascending)
+    totals_by_date = df.groupby('Date', sort=False)['ValueUSD'].sum()
+    
+    # df is sorted by Date, so the latest snapshot and everything before it are
+    # positional slices - no boolean scans and no copies (nothing here writes to them)
+    split = df['Date'].searchsorted(latest_date, side='left')
+    latest_values = df.iloc[split:]
+    earlier = df.iloc[:split]
+    
+    if earlier.empty:
+        return totals_by_date, None
+    
+    # Pair each current entry with the most recent previous entry for that investment
+    prev = (
+        earlier
+        .groupby('Investment', sort=False, observed=True)
+        .tail(1)[['Investment', 'Date', 'Value', 'ValueUSD']]
+        .rename(columns={'Date': 'PrevDate', 'Value': 'PrevValue', 'ValueUSD': 'PrevValueUSD'})
+    )
+    merged = latest_values.merge(prev, on='Investment', how='left')
+    
+    # Work on plain numpy arrays; investments without an earlier entry show no change
+    has_prev = merged['PrevDate'].notna().to_numpy()
+    current_value = merged['Value'].to_numpy(dtype=float)
+    current_value_usd = merged['ValueUSD'].to_numpy(dtype=float)
+    prev_value = np.where(has_prev, merged['PrevValue'].to_numpy(dtype=float), current_value)
+    prev_value_usd = np.where(has_prev, merged['PrevValueUSD'].to_numpy(dtype=float), current_value_usd)
+    
+    # Calculate changes
+    change = current_value - prev_value
+    change_usd = current_value_usd - prev_value_usd
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = np.where(prev_value > 0, (current_value / prev_value - 1) * 100, 0)
+        change_usd_pct = np.where(prev_value_usd > 0, (current_value_usd / prev_value_usd - 1) * 100, 0)
+    
+    # Calculate days between dates
+    days_between = (latest_date - merged['PrevDate']).dt.days
+    
+    # Build the table once from whole numeric columns; formatting happens at display time
+    changes_df = pd.DataFrame({
+        "Investment": merged['Investment'],
+        "Currency": merged['Currency'],
+        "Current Value": current_value,
+        "Current Value (USD)": current_value_usd,
+        "Change": change,
+        "Change %": change_pct,
+        "Change (USD)": change_usd,
+        "Change (USD) %": change_usd_pct,
+        "Previous Update": days_between
+    })
+    # Lowercased names so the search box is a plain substring match
+    changes_df['_inv_lower'] = changes_df['Investment'].str.lower()
     
-    # Add helper columns
-    df['ValueUSD'] = df.apply(
-        lambda row: row['Value'] * get_conversion_rate(row['Currency']), 
-        axis=1
+    return totals_by_date, changes_df
+
+# Latest-snapshot breakdowns by investment, currency and category, keyed like the artifacts above
+@st.cache_data(show_spinner=False)
+def _alloc_breakdowns(mtime, rate_epoch, data_version):
+    df = _prepared_df(mtime, rate_epoch)
+    latest_df = df.iloc[df['Date'].searchsorted(df['Date'].iloc[-1], side='left'):]
+    
+    # The snapshot is small; plain strings keep plotly's treemap/sunburst happy
+    # (they can't aggregate categoricals). Map categories once for every chart,
+    # in the same assign so the slice is materialized a single time.
+    investments = latest_df['Investment'].astype(str)
+    latest_df = latest_df.assign(
+        Investment=investments,
+        Currency=latest_df['Currency'].astype(str),
+        Category=investments.map(INVESTMENT_CATEGORIES)
+    )
+    
+    # Investment and currency shares are of the whole snapshot; categories drop
+    # unmapped investments, so their shares are of the categorized total
+    total_usd = latest_df['ValueUSD'].sum()
+    
+    # Group by investment and calculate percentages
+    allocation = latest_df.groupby('Investment')['ValueUSD'].sum().reset_index()
+    allocation['Percentage'] = np.round(allocation['ValueUSD'].to_numpy() / total_usd * 100, 2)
+    
+    # Add category information
+    allocation['Category'] = allocation['Investment'].map(INVESTMENT_CATEGORIES)
+    
+    # Group by currency
+    currency_breakdown = latest_df.groupby('Currency')['ValueUSD'].sum().reset_index()
+    currency_breakdown['Percentage'] = np.round(currency_breakdown['ValueUSD'].to_numpy() / total_usd * 100, 2)
+    
+    # Group by category
+    category_breakdown = latest_df.groupby('Category')['ValueUSD'].sum().reset_index()
+    category_values = category_breakdown['ValueUSD'].to_numpy()
+    category_breakdown['Percentage'] = np.round(category_values / category_values.sum() * 100, 2)
+    
+    return latest_df, allocation, currency_breakdown, category_breakdown
+
+# Performance tab computations, memoized per date range and selection instead of per rerun
+@st.cache_data(show_spinner=False)
+def _historical_performance(mtime, rate_epoch, data_version, start_date, end_date):
+    performance_data = get_historical_performance(_prepared_df(mtime, rate_epoch), start_date, end_date)
+    
+    # Daily portfolio totals are aggregated here once, not on every chart option change
+    if performance_data.empty:
+        return performance_data, pd.DataFrame(columns=['Date', 'ValueUSD'])
+    
+    # Rows come out in date order, so each date is one contiguous run:
+    # sum the runs with reduceat instead of hashing every date
+    dates = performance_data['Date'].to_numpy()
+    values = performance_data['ValueUSD'].to_numpy(dtype=float)
+    if not performance_data['Date'].is_monotonic_increasing:
+        order = np.argsort(dates, kind='stable')
+        dates, values = dates[order], values[order]
+    unique_dates, starts = np.unique(dates, return_index=True)
+    total_over_time = pd.DataFrame({
+        'Date': unique_dates,
+        'ValueUSD': np.add.reduceat(values, starts)
+    })
+    return performance_data, total_over_time
+
+@st.cache_data(show_spinner=False)
+def _relative_performance(mtime, rate_epoch, data_version, start_date, end_date,
+                          reference_investment, comparison_investments):
+    return get_relative_performance(
+        _prepared_df(mtime, rate_epoch),
+        start_date,
+        end_date,
+        reference_investment,
+        list(comparison_investments)
+    )
+
+# Comparison chart for one selection and display mode; per-rerun toggles are applied on the copy returned
+@st.cache_data(show_spinner=False)
+def _comparison_figure(mtime, rate_epoch, data_version, start_date, end_date,
+                       reference_investment, investments, chart_mode, smoothing):
+    relative_data = _relative_performance(
+        mtime, rate_epoch, data_version, start_date, end_date, reference_investment, investments
+    )
+    
+    # Create line chart for comparison based on mode
+    if chart_mode == "Relative to Baseline":
+        y_column = "RelativePct"
+        title = f"Performance Relative to {reference_investment}"
+        y_title = f"% Difference vs {reference_investment}"
+    else:
+        y_column = "PctChange"
+        title = "Absolute Performance (% Change)"
+        y_title = "% Change from Start"
+
+    # Only the plotted columns go to px.line. Percentages are shown to 2 decimals, so
+    # the plotted column goes out as float32 - half the chart payload; the metrics
+    # table keeps the full-precision frame
+    plot_data = relative_data[['Date', 'Investment', y_column]].astype({y_column: 'float32'})
+    
+    # Long ranges: thin each investment's line on its own (groups keep their first-seen
+    # order, so trace order and colours are unchanged)
+    if plot_data['Investment'].value_counts().max() > MAX_CHART_POINTS:
+        plot_data = pd.concat([
+            downsample_lttb(group, 'Date', y_column, MAX_CHART_POINTS)
+            for _, group in plot_data.groupby('Investment', sort=False, observed=True)
+        ])
+    
+    fig = px.line(
+        plot_data,
+        x='Date',
+        y=y_column,
+        color='Investment',
+        labels={y_column: y_title, 'Date': 'Date'},
+        title=title,
+        line_shape='spline' if smoothing > 0 else 'linear',  # Smooth lines if requested
+        # WebGL can't draw splines, so only use it for straight lines
+        render_mode='svg' if smoothing > 0 else 'webgl'
+    )
+
+    # Final line styling in one pass over the traces: smoothing if requested, and
+    # the reference investment's line stands out
+    for trace in fig.data:
+        if smoothing > 0:
+            trace.line.smoothing = smoothing / 10  # Scale to 0-1 range
+        if trace.name == reference_investment:
+            trace.line.width = 4
+            trace.line.dash = 'solid'
+        else:
+            trace.line.width = 2.5
+
+    # Add zero line for reference
+    fig.add_hline( 
+        y=0, 
+        line_dash="dash", 
+        line_color="white",
+        opacity=0.5,
+        annotation_text="Baseline" if chart_mode == "Relative to Baseline" else "No Change",
+        annotation_position="bottom right"
+    )
+
+    fig.update_layout(
+        height=500,
+        xaxis_title="Date",
+        yaxis_title=y_title,
+        margin=dict(l=20, r=20, t=50, b=50),
+        **DARK_LAYOUT,
+        xaxis=DARK_AXIS,
+        yaxis=DARK_AXIS,
+        hovermode="x unified",
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        ),
+        # Add animations for line transitions
+        transition_duration=500
+    )
+
+    return fig
+
+# Per-investment metrics table, cached with the selection it was computed for
+@st.cache_data(show_spinner=False)
+def _performance_metrics(mtime, rate_epoch, data_version, start_date, end_date,
+                         reference_investment, investments, show_detailed):
+    relative_data = _relative_performance(
+        mtime, rate_epoch, data_version, start_date, end_date, reference_investment, investments
     )
     
-    # Get latest date
-    latest_date = df['Date'].max()
-    earliest_date = df['Date'].min()
+    # Group the date-ordered rows into one contiguous run per investment (a stable sort on
+    # the factorized codes keeps dates ascending inside each run); every per-investment
+    # figure below is then read off the run offsets instead of re-grouping the frame
+    ordered = relative_data.sort_values('Date', kind='stable')
+    codes, uniques = pd.factorize(ordered['Investment'])
+    regroup = np.argsort(codes, kind='stable')
+    codes = codes[regroup]
+    starts = np.flatnonzero(np.diff(codes, prepend=-1))
+    ends = np.r_[starts[1:], len(codes)] - 1
+    
+    # Runs in the order requested
+    uniques = pd.Index(uniques)
+    present = [inv for inv in investments if inv in uniques]
+    runs = uniques.get_indexer(present)
+    first_rows, last_rows = regroup[starts[runs]], regroup[ends[runs]]
+    
+    # Calculate additional metrics
+    dates = ordered['Date'].to_numpy()
+    days_between = (dates[last_rows] - dates[first_rows]) // np.timedelta64(1, 'D')
+    end_pct = ordered['PctChange'].to_numpy(dtype=float)[last_rows]
     
-    # Get latest snapshot
-    latest_df = df[df['Date'] == latest_date]
+    # Calculate compounded annual growth rate (CAGR)
+    years = np.maximum(days_between, 1) / 365
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        cagr = np.where(days_between > 0, ((1 + end_pct / 100) ** (1 / years) - 1) * 100, 0)
+    
+    # Standard metrics; the table is built once from whole columns at the end
+    is_reference = np.asarray(present) == reference_investment
+    columns = {
+        'Investment': present,
+        'Start Value': ordered['Value'].to_numpy()[first_rows],
+        'End Value': ordered['Value'].to_numpy()[last_rows],
+        'Absolute Change %': end_pct,
+        'Relative Change %': ordered['RelativePct'].to_numpy()[last_rows],
+        'Is Reference': is_reference
+    }
+    
+    # Add detailed metrics if requested (only for spans over 30 days)
+    long_enough = days_between > 30
+    if show_detailed and long_enough.any():
+        # Volatility: standard deviation of the step-to-step percentage changes,
+        # with per-run moments from bincount over the flat arrays
+        values = ordered['Value'].to_numpy(dtype=float)[regroup]
+        
+        steps = np.full(len(values), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            steps[1:] = (values[1:] / values[:-1] - 1) * 100
+        steps[starts] = np.nan  # first row of each run has no change
+        valid = ~np.isnan(steps)
+        step_codes, steps = codes[valid], steps[valid]
+        
+        counts = np.bincount(step_codes, minlength=len(uniques))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = np.bincount(step_codes, weights=steps, minlength=len(uniques)) / counts
+            sq_dev = np.bincount(step_codes, weights=(steps - means[step_codes]) ** 2, minlength=len(uniques))
+            # sample std needs two changes, as in pandas
+            volatility = np.where(counts >= 2, np.sqrt(sq_dev / (counts - 1)), np.nan)[runs]
+        
+        # Short spans get NaN through the mask rather than per-investment branches
+        columns['CAGR'] = np.where(long_enough, cagr, np.nan)
+        columns['Volatility'] = np.where(long_enough, volatility, np.nan)
+        columns['Days'] = np.where(long_enough, days_between, np.nan)
+
+    # Add a column for highlighting the reference investment
+    columns['_style'] = np.where(is_reference, 'background-color: rgba(78, 141, 245, 0.2)', '')
+
+    return pd.DataFrame(columns)
+
+with st.spinner("Loading your investment data..."):
+    df = _prepared_df(_data_mtime(), _rate_epoch())
+if df is not None and not df.empty:
+    # Get latest date - df is sorted by Date
+    latest_date = df['Date'].iloc[-1]
+    earliest_date = df['Date'].iloc[0]
+    
+    # Get latest snapshot - the trailing rows, taken as a slice rather than a masked copy
+    latest_df = df.iloc[df['Date'].searchsorted(latest_date, side='left'):]
 else:
     latest_date = datetime.now().date()
     earliest_date = latest_date
@@ -231,20 +545,219 @@ else:
 # Create string-only version of INVESTMENT_ACCOUNTS for use throughout the app
 investment_accounts = {str(k): v for k, v in INVESTMENT_ACCOUNTS.items()}
 
+# Upper bound on points per plotted line; longer series are downsampled
+MAX_CHART_POINTS = 2000
+
+# Trailing-window presets on the Performance tab, in days
+PRESET_RANGE_DAYS = {"1 Month": 30, "3 Months": 90, "6 Months": 180, "1 Year": 365}
+
+# Data tab "Sort by" choices and the column each one sorts on
+DATA_SORT_COLUMNS = {"Date": 'Date', "Investment": 'Investment', "Currency": 'Currency',
+                     "Value": 'Value', "Value (USD)": 'ValueUSD'}
+
+# Resample frequencies for the optional value-over-time aggregation
+AGGREGATION_FREQS = {"Weekly": "W", "Monthly": "MS", "Quarterly": "QS"}
+
+# Shared chart styling, built once and spread into update_layout calls
+DARK_LAYOUT = dict(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='white'))
+DARK_AXIS = dict(gridcolor='rgba(255,255,255,0.1)', zerolinecolor='rgba(255,255,255,0.2)')
+CHART_MARGIN = dict(l=20, r=20, t=30, b=20)
+
+# Category list and category -> investments index, built once instead of per widget
+CATEGORY_LIST = sorted(set(INVESTMENT_CATEGORIES.values()))
+CATEGORY_TO_INVS = {
+    cat: sorted(str(inv) for inv, c in INVESTMENT_CATEGORIES.items() if c == cat)
+    for cat in CATEGORY_LIST
+}
+INV_LOWER = {inv: inv.lower() for invs in CATEGORY_TO_INVS.values() for inv in invs}
+
+# Data tab filter choices for the investments actually present; keyed on their names
+@st.cache_data(show_spinner=False)
+def _invs_by_cat(inv_tuple):
+    unique_investments = list(inv_tuple)
+    investments_by_category = {}
+    for inv in unique_investments:
+        category = INVESTMENT_CATEGORIES.get(inv, "Uncategorized")
+        investments_by_category.setdefault(category, []).append(inv)
+    return unique_investments, investments_by_category, sorted(investments_by_category)
+
+# Settings tab table of configured accounts, keyed on the config entries themselves
+@st.cache_data(show_spinner=False)
+def _accounts_table(account_items, category_items):
+    # One pass over the accounts builds every row, category included
+    categories = dict(category_items)
+    rows = [(inv, cur, categories.get(inv, 'Uncategorized')) for inv, cur in account_items]
+    # Arrow-backed strings so the account search runs str.contains in Arrow compute
+    accounts_df = pd.DataFrame(rows, columns=['Investment', 'Currency', 'Category'], dtype='string[pyarrow]')
+    # Category is categorical: its categories are the sorted distinct names for the filter options
+    accounts_df['Category'] = pd.Categorical(accounts_df['Category'])
+    accounts_df = accounts_df.sort_values(['Category', 'Investment'])
+    # Lowercased copy of every column, row-aligned, so the filter folds case only once
+    lowered = pd.DataFrame({col: accounts_df[col].astype('string[pyarrow]').str.lower() for col in accounts_df.columns})
+    return accounts_df, lowered
+
+# Settings tab exchange rate table; last_updated is only part of the cache key
+@st.cache_data(show_spinner=False)
+def _rates_table(last_updated, rate_items):
+    return pd.DataFrame(list(rate_items), columns=['Currency', 'Rate to USD']).sort_values('Currency')
+
+# Rows where any column contains the query (literal, case-insensitive unless case=True), one column at a time
+def _search_mask(frame, query, case=False):
+    mask = np.zeros(len(frame), dtype=bool)
+    for col in frame.columns:
+        values = frame[col]
+        if not pd.api.types.is_string_dtype(values):
+            values = values.astype(str)
+        mask |= values.str.contains(query, case=case, regex=False, na=False).to_numpy()
+    return mask
+
+# Import type conversion: parsed dates, Arrow-backed text, account currencies and numeric values
+def _coerce_import(frame):
+    frame = frame.copy()
+    if 'Date' in frame.columns:
+        # Most files use ISO dates, which parse in one vectorized pass (each distinct
+        # string once); only other layouts fall back to per-element mixed parsing
+        try:
+            frame['Date'] = pd.to_datetime(frame['Date'], format='ISO8601', cache=True)
+        except (ValueError, TypeError):
+            frame['Date'] = pd.to_datetime(frame['Date'], format='mixed', errors='coerce')
+        frame['Date'] = frame['Date'].fillna(pd.Timestamp(datetime.now().date()))
+
+    # Text columns as Arrow-backed strings: missing cells stay NA and the
+    # isin/map below run on Arrow buffers instead of Python objects
+    if 'Investment' in frame.columns:
+        frame['Investment'] = frame['Investment'].astype('string[pyarrow]')
+
+    if 'Currency' in frame.columns:
+        frame['Currency'] = frame['Currency'].astype('string[pyarrow]')
+        # Fix any missing currencies from the account's configured currency
+        missing = frame['Currency'].isna() | frame['Currency'].isin(['nan', 'None'])
+        if missing.any():
+            frame.loc[missing, 'Currency'] = (
+                frame.loc[missing, 'Investment'].map(investment_accounts).fillna('USD')
+            )
+
+    if 'Value' in frame.columns:
+        frame['Value'] = pd.to_numeric(frame['Value'], errors='coerce')
+        frame = frame.dropna(subset=['Value'])
+    return frame
+
+# Colour per value by order of first appearance, matching px's color= assignment
+def _palette_colors(values, palette=px.colors.qualitative.Plotly):
+    codes, _ = pd.factorize(values, use_na_sentinel=False)
+    return [palette[code % len(palette)] for code in codes]
+
+# All bars in a single trace with per-bar colours, rather than px.bar(color=...)'s
+# one trace per label. Without a palette the bars follow the active template's
+# colorway, as px did (Streamlit's theme when rendered through st.plotly_chart).
+def _labelled_bars(frame, label_col, orientation='v', palette=None):
+    horizontal = orientation == 'h'
+    labels = frame[label_col].to_numpy()
+    values = frame['ValueUSD'].to_numpy()
+    palette = palette or pio.templates[pio.templates.default].layout.colorway or px.colors.qualitative.Plotly
+    return go.Figure(go.Bar(
+        x=values if horizontal else labels,
+        y=labels if horizontal else values,
+        text=frame['Percentage'].to_numpy(),
+        marker_color=_palette_colors(labels, palette),
+        orientation=orientation
+    ))
+
 # Function to reset success message
 def reset_success():
     st.session_state.show_success = False
 
+# Invalidate cached data and dashboard artifacts after a write or rate refresh
+def bump_data_version():
+    _prepared_df.clear()
+    st.session_state.data_version += 1
+
+# Download buttons that build their file only when clicked. Streamlit 1.52+ accepts a
+# callable for data and runs it on click; older versions need the bytes up front
+_CALLABLE_DOWNLOAD_DATA = tuple(int(part) for part in st.__version__.split('.')[:2]) >= (1, 52)
+
+def _download_button(build, **kwargs):
+    return st.download_button(data=build if _CALLABLE_DOWNLOAD_DATA else build(), **kwargs)
+
+# Fragments rerun on their own without re-executing the whole page (Streamlit 1.33+)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+# Sort/filter/search over the cached changes table; these widgets only rerun this fragment
+@_fragment
+def _changes_table(changes_df):
+    try:
+        # The table itself is prepared once per data version; only sorting and filtering run here
+        if changes_df is not None:
+            # Sort by magnitude of change
+            if not changes_df.empty:
+                
+                # Add filter options
+                filter_col1, filter_col2, filter_col3 = st.columns(3)
+                
+                with filter_col1:
+                    sort_by = st.selectbox(
+                        "Sort by",
+                        ["Change (Abs)", "Change (%)", "Value (High to Low)"],
+                        key="changes_sort"
+                    )
+                
+                with filter_col2:
+                    show_only = st.selectbox(
+                        "Show",
+                        ["All", "Positive Changes", "Negative Changes"],
+                        key="changes_filter"
+                    )
+                
+                with filter_col3:
+                    search_inv = st.text_input("🔍 Search", key="changes_search")
+                
+                # Apply sorting
+                if sort_by == "Change (Abs)":
+                    changes_df = changes_df.sort_values("Change (USD)", ascending=False, key=lambda x: x.abs())
+                elif sort_by == "Change (%)":
+                    changes_df = changes_df.sort_values("Change (USD) %", ascending=False)
+                else:  # Value (High to Low)
+                    changes_df = changes_df.sort_values("Current Value (USD)", ascending=False)
+                
+                # Apply filtering
+                if show_only == "Positive Changes":
+                    changes_df = changes_df[changes_df["Change (USD) %"] > 0]
+                elif show_only == "Negative Changes":
+                    changes_df = changes_df[changes_df["Change (USD) %"] < 0]
+                
+                # Apply search
+                if search_inv:
+                    changes_df = changes_df[changes_df["_inv_lower"].str.contains(search_inv.lower(), regex=False, na=False)]
+                
+                # Display the filtered and sorted dataframe; the columns stay numeric so
+                # they also sort correctly when a header is clicked
+                st.dataframe(
+                    changes_df.drop(columns="_inv_lower"),
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "Current Value": st.column_config.NumberColumn(format="%.2f"),
+                        "Current Value (USD)": st.column_config.NumberColumn(format="$%.2f"),
+                        "Change": st.column_config.NumberColumn(format="%+.2f"),
+                        "Change %": st.column_config.NumberColumn(format="%+.2f%%"),
+                        "Change (USD)": st.column_config.NumberColumn(format="$%+.2f"),
+                        "Change (USD) %": st.column_config.NumberColumn(format="%+.2f%%"),
+                        "Previous Update": st.column_config.NumberColumn(format="%d days ago")
+                    }
+                )
+            else:
+                st.info("No investment changes to display.")
+        else:
+            st.info("No historical data available for comparison.")
+    except Exception as e:
+        st.error(f"Error calculating investment changes: {str(e)}")
+
 # Function to add entry with animation
 def add_entry_with_animation(df, date, investment, value):
     with st.spinner("Adding entry..."):
-        progress_bar = st.progress(0)
-        for i in range(101):
-            progress_bar.progress(i)
-            time.sleep(0.005)  # Faster animation
-            
         df = add_entry(df, date, investment, value)
         save_data(df)
+        bump_data_version()
     return df# Sidebar: Data Entry Section
 with st.sidebar:
     st.markdown('<div class="animate-in">', unsafe_allow_html=True)
@@ -306,14 +819,9 @@ with st.sidebar:
         st.markdown('<div class="animate-in">', unsafe_allow_html=True)
         st.subheader("Update Multiple Investments")
         
-        # Extract unique investment categories
-        categories = sorted(list(set(
-            [cat for inv, cat in INVESTMENT_CATEGORIES.items()]
-        )))
-        
         selected_category = st.selectbox(
             "Filter by Category", 
-            ["All"] + categories,
+            ["All"] + CATEGORY_LIST,
             key="bulk_category"
         )
         
@@ -321,10 +829,7 @@ with st.sidebar:
         if selected_category == "All":
             selectable_investments = sorted(list(investment_accounts.keys()))
         else:
-            selectable_investments = sorted([
-                str(inv) for inv, cat in INVESTMENT_CATEGORIES.items() 
-                if cat == selected_category
-            ])
+            selectable_investments = CATEGORY_TO_INVS[selected_category]
         
         # Enhanced multi-select with better styling
         selected_investments = st.multiselect(
@@ -372,13 +877,9 @@ with st.sidebar:
             # Animated button with icon
             if st.button("💾 Submit All Values", key="add_bulk"):
                 with st.spinner("Processing bulk update..."):
-                    progress_bar = st.progress(0)
-                    for i in range(101):
-                        progress_bar.progress(i)
-                        time.sleep(0.01)
-                        
                     df = add_bulk_entries(df, bulk_date, investment_values)
                     save_data(df)
+                    bump_data_version()
                     
                 st.session_state.show_success = True
                 st.rerun()
@@ -407,17 +908,14 @@ with st.sidebar:
         
         # Get the most recent values for all investments
         if not df.empty:
-            # Sort by date descending
-            temp_df = df.sort_values('Date', ascending=False)
-            
-            # Get most recent entry for each investment
-            recent_values = {}
-            for inv in INVESTMENT_ACCOUNTS.keys():
-                inv_data = temp_df[temp_df['Investment'] == inv]
-                if not inv_data.empty:
-                    recent_values[inv] = inv_data.iloc[0]['Value']
-                else:
-                    recent_values[inv] = 0.0
+            # Get most recent entry for each investment in a single pass
+            last_per_inv = (
+                df.groupby('Investment', sort=False, observed=True)
+                .tail(1)
+                .set_index('Investment')['Value']
+                .to_dict()
+            )
+            recent_values = {inv: last_per_inv.get(inv, 0.0) for inv in INVESTMENT_ACCOUNTS}
             
             # Display form with previous values
             st.markdown("### Enter New Values")
@@ -425,25 +923,24 @@ with st.sidebar:
             # Add a search filter for easier navigation
             search_term = st.text_input("🔍 Search investments", key="search_investments")
             
-            categories = sorted(list(set(
-                [cat for inv, cat in INVESTMENT_CATEGORIES.items()]
-            )))
+            search_term_lower = search_term.lower()
+            
+            # Values typed so far, kept across reruns so narrowing or clearing the search
+            # (which changes an editor's rows and resets it) doesn't drop them
+            typed_values = st.session_state.setdefault('all_values_typed', {})
             
             investment_values = {}
             
             # For each category, create an expandable section
-            for category in categories:
+            for category in CATEGORY_LIST:
                 # Get investments for this category
-                category_investments = sorted([
-                    str(inv) for inv, cat in INVESTMENT_CATEGORIES.items() 
-                    if cat == category
-                ])
+                category_investments = CATEGORY_TO_INVS[category]
                 
                 # Filter by search term if provided
                 if search_term:
                     category_investments = [
                         inv for inv in category_investments 
-                        if search_term.lower() in inv.lower()
+                        if search_term_lower in INV_LOWER[inv]
                     ]
                 
                 # Only show categories with matching investments if searching
@@ -452,32 +949,43 @@ with st.sidebar:
                 
                 # Use expander for cleaner UI
                 with st.expander(f"📁 {category} ({len(category_investments)} investments)", expanded=not search_term):
-                    # Create three columns layout
-                    cols = st.columns(3)
-                    
-                    for i, inv in enumerate(category_investments):
-                        col_idx = i % 3
-                        with cols[col_idx]:
-                            currency = investment_accounts.get(inv, 'USD')
-                            prev_value = recent_values.get(inv, 0.0)
-                            investment_values[inv] = st.number_input(
-                                f"{inv} ({currency})",
-                                min_value=0.0,
-                                value=prev_value,
-                                format="%.2f",
-                                key=f"all_value_{inv}"
-                            )
+                    # One editable table per category instead of a widget per investment.
+                    # Indexed by investment so the editor resets when its rows change, not
+                    # when a typed value is seeded back in
+                    edit_df = pd.DataFrame({
+                        'Investment': category_investments,
+                        'Currency': [investment_accounts.get(inv, 'USD') for inv in category_investments],
+                        'Value': [
+                            float(typed_values.get(inv, recent_values.get(inv, 0.0)))
+                            for inv in category_investments
+                        ]
+                    }, index=pd.Index(category_investments, name='Key'))
+                    edited = st.data_editor(
+                        edit_df,
+                        num_rows="fixed",
+                        hide_index=True,
+                        use_container_width=True,
+                        disabled=['Investment', 'Currency'],
+                        column_config={
+                            'Value': st.column_config.NumberColumn(format="%.2f", min_value=0.0)
+                        },
+                        key=f"all_values_{category}"
+                    )
+                    for inv, value in zip(edited['Investment'], edited['Value'].fillna(0.0)):
+                        investment_values[inv] = value
+                        if value != recent_values.get(inv, 0.0):
+                            typed_values[inv] = value
+                        else:
+                            typed_values.pop(inv, None)
             
             # Animated button with icon
             if st.button("💾 Submit All Investments", key="update_all"):
                 with st.spinner("Processing all investments..."):
-                    progress_bar = st.progress(0)
-                    for i in range(101):
-                        progress_bar.progress(i)
-                        time.sleep(0.01)
-                        
                     df = add_bulk_entries(df, update_all_date, investment_values)
                     save_data(df)
+                    bump_data_version()
+                    # The saved values are the new starting point
+                    typed_values.clear()
                     
                 st.session_state.show_success = True
                 st.rerun()
@@ -488,12 +996,9 @@ with st.sidebar:
     with refresh_col1:
         if st.button("🔄 Refresh Exchange Rates"):
             with st.spinner("Refreshing rates..."):
-                progress_bar = st.progress(0)
-                for i in range(101):
-                    progress_bar.progress(i)
-                    time.sleep(0.01)
-                    
                 refresh_rates()
+                # ValueUSD depends on the rates, not just the data file
+                bump_data_version()
                 
             st.success("Exchange rates refreshed!")
             st.session_state.last_refresh = datetime.now()
@@ -503,359 +1008,328 @@ with st.sidebar:
 
 # Display success message if needed
 if st.session_state.show_success:
-    st.success("✅ Data saved successfully!")
-    # Auto-clear the success message after 3 seconds
-    time.sleep(2)
-    st.session_state.show_success = False # Main content - Tabbed interface with icons and animations
-tab1, tab2, tab3, tab4 = st.tabs([
+    # Toasts dismiss themselves, so there is no need to hold the script here
+    st.toast("Data saved successfully!", icon="✅")
+    st.session_state.show_success = False
+
+# Main content - Tabbed interface with icons and animations
+TAB_LABELS = [
     "📊📊📊 Dashboard", 
     "📈📈📈 Performance", 
     "📋📋📋 Data", 
     "⚙️⚙️⚙️ Settings"
-])
+]
+try:
+    # Switching tabs reruns the script, so only the selected tab's body needs to run
+    tab1, tab2, tab3, tab4 = st.tabs(TAB_LABELS, key="main_tabs", on_change="rerun")
+except TypeError:
+    # Older Streamlit without lazy tabs - every tab body runs, as before
+    tab1, tab2, tab3, tab4 = st.tabs(TAB_LABELS)
+
+def _tab_open(tab):
+    return getattr(tab, "open", None) is not False
+
+# Streamlit drops the state of widgets that are not rendered in a run, which is every
+# widget of a closed lazy tab. Their values are copied to plain session_state keys while
+# the tab is open and put back when it opens again, so filters and choices survive a
+# tab switch. Buttons, download buttons and uploaders can't be set and are not listed.
+TAB_WIDGET_KEYS = {
+    "dashboard": (
+        "pie_threshold", "exploded_pie", "currency_chart_type", "category_chart_type",
+    ),
+    "performance": (
+        "preset_date_range", "perf_start", "perf_end", "value_chart_type",
+        "show_aggregation", "agg_method", "show_annotations", "reference_investment",
+        "performance_investments", "performance_mode", "line_smoothing", "show_markers",
+        "show_detailed", "show_metrics_chart",
+    ),
+    "data": (
+        "date_filter_type", "date_preset", "data_start", "data_end", "specific_date_type",
+        "specific_date", "investment_filter_mode", "category_filter", "investment_filter",
+        "data_search", "rows_per_page", "sort_column", "sort_order", "data_page",
+        "show_summary_stats", "export_format", "export_scope", "backup_format",
+        "backup_name", "import_action",
+    ),
+}
+
+def _keep_widget_state(keys):
+    for key in keys:
+        saved_key = f"_kept_{key}"
+        if key in st.session_state:
+            st.session_state[saved_key] = st.session_state[key]
+        elif saved_key in st.session_state:
+            st.session_state[key] = st.session_state[saved_key]
 
 with tab1:
-    # Dashboard tab with animations
-    st.markdown('<div class="animate-in">', unsafe_allow_html=True)
-    st.header("Portfolio Dashboard")
+    if _tab_open(tab1):
+        _keep_widget_state(TAB_WIDGET_KEYS["dashboard"])
+        # Dashboard tab with animations
+        st.markdown('<div class="animate-in">', unsafe_allow_html=True)
+        st.header("Portfolio Dashboard")
     
-    if not latest_df.empty:
-        # Top metrics row with enhanced animations
-        total_usd = latest_df['ValueUSD'].sum()
+        if not latest_df.empty:
+            # Top metrics row with enhanced animations
+            total_usd = latest_df['ValueUSD'].sum()
         
-        # Add a loading effect
-        with st.spinner("Loading dashboard metrics..."):
-            time.sleep(0.5)  # Short delay for animation effect
+            metrics_col1, metrics_col2, metrics_col3, metrics_col4 = st.columns(4)
         
-        metrics_col1, metrics_col2, metrics_col3, metrics_col4 = st.columns(4)
+            totals_by_date, changes_df = _dashboard_artifacts(_data_mtime(), _rate_epoch(), st.session_state.data_version)
+            unique_dates = totals_by_date.index.to_numpy()
         
-        with metrics_col1:
-            st.metric(
-                "Total Portfolio Value", 
-                f"${total_usd:,.2f} USD"
+            with metrics_col1:
+                st.metric(
+                    "Total Portfolio Value", 
+                    f"${total_usd:,.2f} USD"
+                )
+        
+            # 1M/3M compare against the last snapshot on or before the target date,
+            # YTD against the first snapshot of the year
+            period_metrics = [
+                (metrics_col2, "1 Month Change", latest_date - timedelta(days=30), 'right'),
+                (metrics_col3, "3 Month Change", latest_date - timedelta(days=90), 'right'),
+                (metrics_col4, "YTD Change", datetime(latest_date.year, 1, 1), 'left'),
+            ]
+            targets = pd.to_datetime([target for _, _, target, _ in period_metrics]).to_numpy()
+            before_idx = np.searchsorted(unique_dates, targets, side='right') - 1
+            after_idx = np.searchsorted(unique_dates, targets, side='left')
+        
+            for i, (col, label, _, side) in enumerate(period_metrics):
+                idx = before_idx[i] if side == 'right' else after_idx[i]
+                with col:
+                    if 0 <= idx < len(unique_dates):
+                        prev_total = totals_by_date.iloc[idx]
+                        change = total_usd - prev_total
+                        percent = (change / prev_total) * 100 if prev_total > 0 else 0
+                        st.metric(
+                            label, 
+                            f"${change:,.2f}", 
+                            f"{percent:.2f}%",
+                            delta_color="normal" if change >= 0 else "inverse"
+                        )
+                    else:
+                        st.metric(label, "N/A")
+            st.markdown("---")
+            st.subheader("Investment Value Changes")
+        
+            _changes_table(changes_df)
+            st.markdown("---")
+            st.markdown("---")
+            # Charts row with improved visualizations
+            chart_col1, chart_col2 = st.columns(2)
+            
+            # Groupbys are cached; chart widgets below only filter and sort these frames
+            category_latest, allocation, currency_breakdown, category_breakdown = _alloc_breakdowns(
+                _data_mtime(), _rate_epoch(), st.session_state.data_version
             )
         
-        # Calculate 1 month change with improved error handling
-        try:
-            one_month_ago = latest_date - timedelta(days=30)
-            closest_date = df[df['Date'] <= one_month_ago]['Date'].max()
+            with chart_col1:
+                st.subheader("Asset Allocation")
+            
+                # Allow filtering by threshold percentage
+                min_pct = st.slider(
+                    "Minimum percentage to display (smaller holdings grouped as 'Other')", 
+                    min_value=0.0, 
+                    max_value=10.0, 
+                    value=1.0,
+                    step=0.5,
+                    key="pie_threshold"
+                )
+            
+                # Group small investments as "Other"
+                if min_pct > 0:
+                    small_mask = allocation['Percentage'] < min_pct
+                    if small_mask.any():
+                        other = allocation.loc[small_mask, ['ValueUSD', 'Percentage']].sum()
+                        allocation = allocation.loc[~small_mask].reset_index(drop=True)
+                        allocation.loc[len(allocation)] = {
+                            'Investment': 'Other',
+                            'ValueUSD': other['ValueUSD'],
+                            'Percentage': other['Percentage'],
+                            'Category': 'Other'
+                        }
+                # Add checkbox to control pie explosion
+                exploded_view = st.checkbox("Show exploded view", value=False, key="exploded_pie")
+
+                # Create improved pie chart with animation
+                fig = go.Figure(go.Pie(
+                    labels=allocation['Investment'].to_numpy(),
+                    values=allocation['ValueUSD'].to_numpy(),
+                    customdata=allocation[['Percentage']].to_numpy(),
+                    marker=dict(colors=_palette_colors(allocation['Category']))
+                ))
+            
+                # Enhanced styling for interactive pie chart
+                fig.update_traces(
+                    textposition='inside', 
+                    textinfo='percent+label',
+                    textfont_size=12,
+                    pull=[0.15 if exploded_view else 0.05] * len(allocation),  # More pull when exploded view is active
+                    marker=dict(line=dict(color='#1e1e2e', width=1)),
+                    hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Percentage: %{customdata[0]:.2f}%<extra></extra>'
+                )
+            
+                fig.update_layout(
+                    height=450,  # Increased height
+                    margin=dict(l=20, r=20, t=30, b=100),  # Increased bottom margin for legend
+                    legend=dict(
+                        orientation="h",
+                        yanchor="bottom",
+                        y=-0.30,  # Moved much further down
+                        xanchor="center",
+                        x=0.5,
+                        bgcolor="rgba(0,0,0,0.1)",
+                        bordercolor="rgba(255,255,255,0.2)",
+                        borderwidth=1
+                    ),
+                    **DARK_LAYOUT
+                    # Removed the non-functioning updatemenus section
+                )
+            
+                st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+            with chart_col2:
+                st.subheader("Currency Breakdown")
+            
+                # Add visualization options
+                chart_type = st.radio(
+                    "Chart Type",
+                    ["Bar Chart", "Pie Chart", "Treemap"],
+                    horizontal=True,
+                    key="currency_chart_type"
+                )
             
-            if pd.notna(closest_date):
-                month_df = df[df['Date'] == closest_date]
-                month_total = month_df['ValueUSD'].sum()
-                month_change = total_usd - month_total
-                month_percent = (month_change / month_total) * 100 if month_total > 0 else 0
+                if chart_type == "Bar Chart":
+                    # Create enhanced bar chart with animations
+                    fig = _labelled_bars(
+                        currency_breakdown.sort_values('ValueUSD', ascending=False),
+                        'Currency',
+                        palette=px.colors.qualitative.Plotly
+                    )
                 
-                with metrics_col2:
-                    st.metric(
-                        "1 Month Change", 
-                        f"${month_change:,.2f}", 
-                        f"{month_percent:.2f}%",
-                        delta_color="normal" if month_change >= 0 else "inverse"
+                    fig.update_traces(
+                        texttemplate='%{text:.1f}%', 
+                        textposition='outside',
+                        marker_line_color='rgba(255,255,255,0.2)',
+                        marker_line_width=1,
+                        hovertemplate='<b>%{x}</b><br>Value: $%{y:,.2f}<br>Percentage: %{text:.1f}%<extra></extra>'
                     )
-            else:
-                with metrics_col2:
-                    st.metric("1 Month Change", "N/A")
-        except Exception as e:
-            with metrics_col2:
-                st.metric("1 Month Change", "N/A")# Calculate 3 month change
-        try:
-            three_months_ago = latest_date - timedelta(days=90)
-            closest_date = df[df['Date'] <= three_months_ago]['Date'].max()
-            
-            if pd.notna(closest_date):
-                quarter_df = df[df['Date'] == closest_date]
-                quarter_total = quarter_df['ValueUSD'].sum()
-                quarter_change = total_usd - quarter_total
-                quarter_percent = (quarter_change / quarter_total) * 100 if quarter_total > 0 else 0
                 
-                with metrics_col3:
-                    st.metric(
-                        "3 Month Change", 
-                        f"${quarter_change:,.2f}", 
-                        f"{quarter_percent:.2f}%",
-                        delta_color="normal" if quarter_change >= 0 else "inverse"
+                    fig.update_traces(width=0.6)  # Make bars thinner for better appearance
+                
+                    # Add drop shadow for better visual effect
+                    fig.update_layout(
+                        height=450,  # Match pie chart height
+                        xaxis_title="Currency",
+                        yaxis_title="Value (USD)",
+                        margin=CHART_MARGIN,
+                        **DARK_LAYOUT,
+                        yaxis=DARK_AXIS,
+                        xaxis=DARK_AXIS,
+                        # Animation setup
+                        updatemenus=[{
+                            'type': 'buttons',
+                            'showactive': False,
+                            'buttons': [
+                                {
+                                    'method': 'animate',
+                                    'label': 'Reset View',
+                                    'args': [None]
+                                }
+                            ],
+                            'x': 0.05,
+                            'y': 1.05,
+                        }]
                     )
-            else:
-                with metrics_col3:
-                    st.metric("3 Month Change", "N/A")
-        except Exception as e:
-            with metrics_col3:
-                st.metric("3 Month Change", "N/A")
-        
-        # Calculate YTD change
-        try:
-            start_of_year = datetime(latest_date.year, 1, 1).date()
-            closest_date = df[df['Date'] >= start_of_year]['Date'].min()
-            
-            if pd.notna(closest_date):
-                ytd_df = df[df['Date'] == closest_date]
-                ytd_total = ytd_df['ValueUSD'].sum()
-                ytd_change = total_usd - ytd_total
-                ytd_percent = (ytd_change / ytd_total) * 100 if ytd_total > 0 else 0
                 
-                with metrics_col4:
-                    st.metric(
-                        "YTD Change", 
-                        f"${ytd_change:,.2f}", 
-                        f"{ytd_percent:.2f}%",
-                        delta_color="normal" if ytd_change >= 0 else "inverse"
+                elif chart_type == "Pie Chart":
+                    # Create pie chart for currencies
+                    fig = go.Figure(go.Pie(
+                        labels=currency_breakdown['Currency'].to_numpy(),
+                        values=currency_breakdown['ValueUSD'].to_numpy(),
+                        customdata=currency_breakdown[['Percentage']].to_numpy()
+                    ))
+                
+                    fig.update_traces(
+                        textposition='inside',
+                        textinfo='percent+label',
+                        marker=dict(line=dict(color='#1e1e2e', width=1)),
+                        hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Percentage: %{customdata[0]:.1f}%<extra></extra>'
                     )
-            else:
-                with metrics_col4:
-                    st.metric("YTD Change", "N/A")
-        except Exception as e:
-            with metrics_col4:
-                st.metric("YTD Change", "N/A")
-        st.markdown("---")
-        st.subheader("Investment Value Changes")
-        
-        try:
-            # Get the latest date data
-            latest_date = df['Date'].max()
-            latest_values = df[df['Date'] == latest_date].copy()
-            
-            # Get all dates except the latest one
-            previous_dates = df[df['Date'] < latest_date]['Date'].unique()
-            
-            if len(previous_dates) > 0:
-                # Find changes for each investment
-                changes_data = []
                 
-                for _, row in latest_values.iterrows():
-                    inv = row['Investment']
-                    current_value = row['Value']
-                    currency = row['Currency']
-                    current_value_usd = row['ValueUSD']
-                    
-                    # Find the most recent previous entry for this investment
-                    prev_entries = df[(df['Date'] < latest_date) & (df['Investment'] == inv)].sort_values('Date', ascending=False)
-                    
-                    if not prev_entries.empty:
-                        # Get the most recent previous entry
-                        prev_row = prev_entries.iloc[0]
-                        prev_date = prev_row['Date']
-                        prev_value = prev_row['Value']
-                        prev_value_usd = prev_row['ValueUSD']
-                        
-                        # Calculate days between dates
-                        days_between = (latest_date - prev_date).days
-                        
-                        # Calculate changes
-                        change = current_value - prev_value
-                        change_pct = ((current_value / prev_value) - 1) * 100 if prev_value > 0 else 0
-                        
-                        change_usd = current_value_usd - prev_value_usd
-                        change_usd_pct = ((current_value_usd / prev_value_usd) - 1) * 100 if prev_value_usd > 0 else 0
-                        
-                        # Add to results with formatted strings
-                        changes_data.append({
-                            "Investment": inv,
-                            "Current Value": f"{current_value:,.2f} {currency}",
-                            "Current Value (USD)": f"${current_value_usd:,.2f}",
-                            "Change": f"{change:+,.2f} {currency} ({change_pct:+.2f}%)",
-                            "Change (USD)": f"${change_usd:+,.2f} ({change_usd_pct:+.2f}%)",
-                            "Previous Update": f"{days_between} days ago",
-                            "_sort_value": abs(change_usd),  # For sorting
-                            "_change_pct": change_usd_pct,   # For conditional formatting
-                            # Add these numeric columns for sorting
-                            "Current Value Num": current_value_usd,
-                            "Change Num": change_usd,
-                            "Change Pct Num": change_usd_pct
-                        })
-                    else:
-                        # No previous data for this investment
-                        changes_data.append({
-                            "Investment": inv,
-                            "Current Value": f"{current_value:,.2f} {currency}",
-                            "Current Value (USD)": f"${current_value_usd:,.2f}",
-                            "Change": f"{change:+,.2f} {currency} ({change_pct:+.2f}%)",
-                            "Change (USD)": f"${change_usd:+,.2f} ({change_usd_pct:+.2f}%)",
-                            "Previous Update": f"{days_between} days ago",
-                            "_sort_value": abs(change_usd),  # For sorting
-                            "_change_pct": change_usd_pct,   # For conditional formatting
-                            # Add these numeric columns for sorting
-                            "Current Value Num": current_value_usd,
-                            "Change Num": change_usd,
-                            "Change Pct Num": change_usd_pct
-                        })
+                    fig.update_layout(
+                        height=450,
+                        margin=CHART_MARGIN,
+                        **DARK_LAYOUT
+                    )
                 
-                # Create DataFrame and sort by magnitude of change
-                if changes_data:
-                    changes_df = pd.DataFrame(changes_data)
-                    
-                    # Add filter options
-                    filter_col1, filter_col2, filter_col3 = st.columns(3)
-                    
-                    with filter_col1:
-                        sort_by = st.selectbox(
-                            "Sort by",
-                            ["Change (Abs)", "Change (%)", "Value (High to Low)"],
-                            key="changes_sort"
-                        )
-                    
-                    with filter_col2:
-                        show_only = st.selectbox(
-                            "Show",
-                            ["All", "Positive Changes", "Negative Changes"],
-                            key="changes_filter"
-                        )
-                    
-                    with filter_col3:
-                        search_inv = st.text_input("🔍 Search", key="changes_search")
-                    
-                    # Apply sorting
-                    if sort_by == "Change (Abs)":
-                        changes_df = changes_df.sort_values("_sort_value", ascending=False)
-                    elif sort_by == "Change (%)":
-                        changes_df = changes_df.sort_values("_change_pct", ascending=False)
-                    else:  # Value (High to Low)
-                        changes_df = changes_df.sort_values("Current Value (USD)", ascending=False, key=lambda x: x.str.replace('$', '').str.replace(',', '').astype(float))
-                    
-                    # Apply filtering
-                    if show_only == "Positive Changes":
-                        changes_df = changes_df[changes_df["_change_pct"] > 0]
-                    elif show_only == "Negative Changes":
-                        changes_df = changes_df[changes_df["_change_pct"] < 0]
-                    
-                    # Apply search
-                    if search_inv:
-                        changes_df = changes_df[changes_df["Investment"].str.contains(search_inv, case=False)]
-                    
-                    # Apply sorting and filtering to the DataFrame
-                    # (Your existing code for this)
-
-                    # Final step: Before displaying, create a display copy that keeps the sorting columns
-                    # but renames them to hidden versions that can be used for sorting
-                    display_df = changes_df.rename(columns={
-                        "Current Value Num": "_Current Value Num", 
-                        "Change Num": "_Change Num", 
-                        "Change Pct Num": "_Change Pct Num"
-                    })
-
-                    # Display the filtered and sorted dataframe
-                    # Remove the problematic column configuration options
-                    st.dataframe(
-                        display_df,
-                        use_container_width=True,
-                        hide_index=True
+                else:  # Treemap
+                    # Create treemap for currencies
+                    fig = px.treemap(
+                        currency_breakdown,
+                        path=['Currency'],
+                        values='ValueUSD',
+                        color='Currency',
+                        hover_data=['Percentage'],
+                        title=''
                     )
-                else:
-                    st.info("No investment changes to display.")
-            else:
-                st.info("No historical data available for comparison.")
-        except Exception as e:
-            st.error(f"Error calculating investment changes: {str(e)}")
-        st.markdown("---")
-        st.markdown("---")
-        # Charts row with improved visualizations
-        chart_col1, chart_col2 = st.columns(2)
-        
-        with chart_col1:
-            st.subheader("Asset Allocation")
-            
-            # Group by investment and calculate percentages
-            allocation = latest_df.groupby('Investment')['ValueUSD'].sum().reset_index()
-            allocation['Percentage'] = (allocation['ValueUSD'] / allocation['ValueUSD'].sum() * 100).round(2)
-            
-            # Add category information
-            allocation['Category'] = allocation['Investment'].map(INVESTMENT_CATEGORIES)
-            
-            # Allow filtering by threshold percentage
-            min_pct = st.slider(
-                "Minimum percentage to display (smaller holdings grouped as 'Other')", 
-                min_value=0.0, 
-                max_value=10.0, 
-                value=1.0,
-                step=0.5,
-                key="pie_threshold"
-            )
-            
-            # Group small investments as "Other"
-            if min_pct > 0:
-                small_investments = allocation[allocation['Percentage'] < min_pct]
-                if not small_investments.empty:
-                    other_row = {
-                        'Investment': 'Other',
-                        'ValueUSD': small_investments['ValueUSD'].sum(),
-                        'Percentage': small_investments['Percentage'].sum(),
-                        'Category': 'Other'
-                    }
-                    allocation = allocation[allocation['Percentage'] >= min_pct]
-                    allocation = pd.concat([allocation, pd.DataFrame([other_row])], ignore_index=True)
-            # Add checkbox to control pie explosion
-            exploded_view = st.checkbox("Show exploded view", value=False, key="exploded_pie")
-
-            # Create improved pie chart with animation
-            fig = px.pie(
-                allocation, 
-                values='ValueUSD', 
-                names='Investment',
-                hover_data=['Percentage'],
-                labels={'ValueUSD': 'Value (USD)'},
-                title='',
-                color='Category',
-                color_discrete_sequence=px.colors.qualitative.Plotly
-            )
-            
-            # Enhanced styling for interactive pie chart
-            fig.update_traces(
-                textposition='inside', 
-                textinfo='percent+label',
-                textfont_size=12,
-                pull=[0.15 if exploded_view else 0.05] * len(allocation),  # More pull when exploded view is active
-                marker=dict(line=dict(color='#1e1e2e', width=1)),
-                hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Percentage: %{customdata[0]:.2f}%<extra></extra>'
-            )
-            
-            fig.update_layout(
-                height=450,  # Increased height
-                margin=dict(l=20, r=20, t=30, b=100),  # Increased bottom margin for legend
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=-0.30,  # Moved much further down
-                    xanchor="center",
-                    x=0.5,
-                    bgcolor="rgba(0,0,0,0.1)",
-                    bordercolor="rgba(255,255,255,0.2)",
-                    borderwidth=1
-                ),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white')
-                # Removed the non-functioning updatemenus section
-            )
-            
-            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
-        with chart_col2:
-            st.subheader("Currency Breakdown")
-            
-            # Group by currency
-            currency_breakdown = latest_df.groupby('Currency')['ValueUSD'].sum().reset_index()
-            currency_breakdown['Percentage'] = (currency_breakdown['ValueUSD'] / currency_breakdown['ValueUSD'].sum() * 100).round(2)
-            
+                
+                    fig.update_traces(
+                        textinfo='label+value+percent root',
+                        hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Percentage: %{customdata[0]:.1f}%<extra></extra>'
+                    )
+                
+                    fig.update_layout(
+                        height=450,
+                        margin=CHART_MARGIN,
+                        **DARK_LAYOUT
+                    )
+                
+                st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})# Bottom charts row with enhanced category visualization
+            st.subheader("Category Breakdown")
+        
             # Add visualization options
-            chart_type = st.radio(
-                "Chart Type",
-                ["Bar Chart", "Pie Chart", "Treemap"],
+            category_chart_type = st.radio(
+                "Visualization Type",
+                ["Horizontal Bar", "Vertical Bar", "Treemap", "Sunburst"],
                 horizontal=True,
-                key="currency_chart_type"
+                key="category_chart_type"
             )
+        
+            if category_chart_type == "Horizontal Bar":
+                # Create horizontal bar chart with improved styling
+                fig = _labelled_bars(
+                    category_breakdown.sort_values('ValueUSD', ascending=True),
+                    'Category',
+                    orientation='h'
+                )
             
-            if chart_type == "Bar Chart":
-                # Create enhanced bar chart with animations
-                fig = px.bar(
-                    currency_breakdown.sort_values('ValueUSD', ascending=False),
-                    x='Currency',
-                    y='ValueUSD',
-                    text='Percentage',
-                    color='Currency',
-                    labels={'ValueUSD': 'Value (USD)', 'Currency': 'Currency'},
-                    title='',
-                    color_discrete_sequence=px.colors.qualitative.Plotly
+                fig.update_traces(
+                    texttemplate='%{text:.1f}%', 
+                    textposition='inside',
+                    marker_line_color='rgba(255,255,255,0.2)',
+                    marker_line_width=1,
+                    hovertemplate='<b>%{y}</b><br>Value: $%{x:,.2f}<br>Percentage: %{text:.1f}%<extra></extra>'
                 )
-                
+            
+                # Animation settings
+                fig.update_layout(
+                    height=350,
+                    yaxis_title="",
+                    xaxis_title="Value (USD)",
+                    margin=CHART_MARGIN,
+                    **DARK_LAYOUT,
+                    xaxis=DARK_AXIS,
+                    yaxis=DARK_AXIS,
+                    # Add transition effect
+                    transition_duration=500
+                )
+            
+            elif category_chart_type == "Vertical Bar":
+                # Create vertical bar chart for categories
+                fig = _labelled_bars(
+                    category_breakdown.sort_values('ValueUSD', ascending=False),
+                    'Category'
+                )
+            
                 fig.update_traces(
                     texttemplate='%{text:.1f}%', 
                     textposition='outside',
@@ -863,1165 +1337,782 @@ with tab1:
                     marker_line_width=1,
                     hovertemplate='<b>%{x}</b><br>Value: $%{y:,.2f}<br>Percentage: %{text:.1f}%<extra></extra>'
                 )
-                
-                # Add animation effect
-                for i, bar in enumerate(fig.data):
-                    bar.width = 0.6  # Make bars thinner for better appearance
-                
-                # Add drop shadow for better visual effect
+            
                 fig.update_layout(
-                    height=450,  # Match pie chart height
-                    xaxis_title="Currency",
+                    height=350,
+                    xaxis_title="Category",
                     yaxis_title="Value (USD)",
-                    margin=dict(l=20, r=20, t=30, b=20),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white'),
-                    yaxis=dict(
-                        gridcolor='rgba(255,255,255,0.1)',
-                        zerolinecolor='rgba(255,255,255,0.2)'
-                    ),
-                    xaxis=dict(
-                        gridcolor='rgba(255,255,255,0.1)',
-                        zerolinecolor='rgba(255,255,255,0.2)'
-                    ),
-                    # Animation setup
-                    updatemenus=[{
-                        'type': 'buttons',
-                        'showactive': False,
-                        'buttons': [
-                            {
-                                'method': 'animate',
-                                'label': 'Reset View',
-                                'args': [None]
-                            }
-                        ],
-                        'x': 0.05,
-                        'y': 1.05,
-                    }]
+                    margin=CHART_MARGIN,
+                    **DARK_LAYOUT,
+                    xaxis=DARK_AXIS,
+                    yaxis=DARK_AXIS,
+                    # Add animation effect
+                    transition_duration=500
                 )
-                
-            elif chart_type == "Pie Chart":
-                # Create pie chart for currencies
-                fig = px.pie(
-                    currency_breakdown,
+            
+            elif category_chart_type == "Treemap":
+                # Create treemap for categories
+                fig = px.treemap(
+                    category_breakdown,
+                    path=['Category'],
                     values='ValueUSD',
-                    names='Currency',
+                    color='Category',
                     hover_data=['Percentage'],
                     title=''
                 )
-                
+            
                 fig.update_traces(
-                    textposition='inside',
-                    textinfo='percent+label',
-                    marker=dict(line=dict(color='#1e1e2e', width=1)),
+                    textinfo='label+value+percent',
                     hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Percentage: %{customdata[0]:.1f}%<extra></extra>'
                 )
-                
+            
                 fig.update_layout(
-                    height=450,
-                    margin=dict(l=20, r=20, t=30, b=20),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white')
+                    height=350,
+                    margin=CHART_MARGIN,
+                    **DARK_LAYOUT
                 )
-                
-            else:  # Treemap
-                # Create treemap for currencies
-                fig = px.treemap(
-                    currency_breakdown,
-                    path=['Currency'],
+            
+            else:  # Sunburst
+                # Create sunburst chart for category > investment hierarchy
+                fig = px.sunburst(
+                    category_latest,
+                    path=['Category', 'Investment'],
                     values='ValueUSD',
-                    color='Currency',
-                    hover_data=['Percentage'],
+                    color='Category',
+                    hover_data=['Currency', 'Value'],
                     title=''
                 )
-                
+            
                 fig.update_traces(
-                    textinfo='label+value+percent root',
-                    hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Percentage: %{customdata[0]:.1f}%<extra></extra>'
+                    textinfo='label+percent entry',
+                    hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Currency: %{customdata[0]}<br>Original Value: %{customdata[1]:,.2f}<extra></extra>'
                 )
-                
+            
                 fig.update_layout(
-                    height=450,
-                    margin=dict(l=20, r=20, t=30, b=20),
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    font=dict(color='white')
+                    height=500,  # Taller for better visibility
+                    margin=CHART_MARGIN,
+                    **DARK_LAYOUT
                 )
-                
-            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})# Bottom charts row with enhanced category visualization
-        st.subheader("Category Breakdown")
-        
-        # Group by category
-        category_data = latest_df.copy()
-        category_data['Category'] = category_data['Investment'].map(INVESTMENT_CATEGORIES)
-        category_breakdown = category_data.groupby('Category')['ValueUSD'].sum().reset_index()
-        category_breakdown['Percentage'] = (category_breakdown['ValueUSD'] / category_breakdown['ValueUSD'].sum() * 100).round(2)
-        
-        # Add visualization options
-        category_chart_type = st.radio(
-            "Visualization Type",
-            ["Horizontal Bar", "Vertical Bar", "Treemap", "Sunburst"],
-            horizontal=True,
-            key="category_chart_type"
-        )
-        
-        if category_chart_type == "Horizontal Bar":
-            # Create horizontal bar chart with improved styling
-            fig = px.bar(
-                category_breakdown.sort_values('ValueUSD', ascending=True),
-                y='Category',
-                x='ValueUSD',
-                text='Percentage',
-                color='Category',
-                orientation='h',
-                labels={'ValueUSD': 'Value (USD)', 'Category': 'Category'},
-                title=''
-            )
             
-            fig.update_traces(
-                texttemplate='%{text:.1f}%', 
-                textposition='inside',
-                marker_line_color='rgba(255,255,255,0.2)',
-                marker_line_width=1,
-                hovertemplate='<b>%{y}</b><br>Value: $%{x:,.2f}<br>Percentage: %{text:.1f}%<extra></extra>'
-            )
-            
-            # Animation settings
-            fig.update_layout(
-                height=350,
-                yaxis_title="",
-                xaxis_title="Value (USD)",
-                margin=dict(l=20, r=20, t=30, b=20),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                xaxis=dict(
-                    gridcolor='rgba(255,255,255,0.1)',
-                    zerolinecolor='rgba(255,255,255,0.2)'
-                ),
-                yaxis=dict(
-                    gridcolor='rgba(255,255,255,0.1)',
-                    zerolinecolor='rgba(255,255,255,0.2)'
-                ),
-                # Add transition effect
-                transition_duration=500
-            )
-            
-        elif category_chart_type == "Vertical Bar":
-            # Create vertical bar chart for categories
-            fig = px.bar(
-                category_breakdown.sort_values('ValueUSD', ascending=False),
-                x='Category',
-                y='ValueUSD',
-                text='Percentage',
-                color='Category',
-                labels={'ValueUSD': 'Value (USD)', 'Category': 'Category'},
-                title=''
-            )
-            
-            fig.update_traces(
-                texttemplate='%{text:.1f}%', 
-                textposition='outside',
-                marker_line_color='rgba(255,255,255,0.2)',
-                marker_line_width=1,
-                hovertemplate='<b>%{x}</b><br>Value: $%{y:,.2f}<br>Percentage: %{text:.1f}%<extra></extra>'
-            )
-            
-            fig.update_layout(
-                height=350,
-                xaxis_title="Category",
-                yaxis_title="Value (USD)",
-                margin=dict(l=20, r=20, t=30, b=20),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                xaxis=dict(
-                    gridcolor='rgba(255,255,255,0.1)',
-                    zerolinecolor='rgba(255,255,255,0.2)'
-                ),
-                yaxis=dict(
-                    gridcolor='rgba(255,255,255,0.1)',
-                    zerolinecolor='rgba(255,255,255,0.2)'
-                ),
-                # Add animation effect
-                transition_duration=500
-            )
-            
-        elif category_chart_type == "Treemap":
-            # Create treemap for categories
-            fig = px.treemap(
-                category_breakdown,
-                path=['Category'],
-                values='ValueUSD',
-                color='Category',
-                hover_data=['Percentage'],
-                title=''
-            )
-            
-            fig.update_traces(
-                textinfo='label+value+percent',
-                hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Percentage: %{customdata[0]:.1f}%<extra></extra>'
-            )
-            
-            fig.update_layout(
-                height=350,
-                margin=dict(l=20, r=20, t=30, b=20),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white')
-            )
-            
-        else:  # Sunburst
-            # Create a more detailed dataset for the sunburst chart
-            sunburst_data = latest_df.copy()
-            sunburst_data['Category'] = sunburst_data['Investment'].map(INVESTMENT_CATEGORIES)
-            
-            # Create sunburst chart for category > investment hierarchy
-            fig = px.sunburst(
-                sunburst_data,
-                path=['Category', 'Investment'],
-                values='ValueUSD',
-                color='Category',
-                hover_data=['Currency', 'Value'],
-                title=''
-            )
-            
-            fig.update_traces(
-                textinfo='label+percent entry',
-                hovertemplate='<b>%{label}</b><br>Value: $%{value:,.2f}<br>Currency: %{customdata[0]}<br>Original Value: %{customdata[1]:,.2f}<extra></extra>'
-            )
-            
-            fig.update_layout(
-                height=500,  # Taller for better visibility
-                margin=dict(l=20, r=20, t=30, b=20),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white')
-            )
-            
-        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
         
-    else:
-        st.info("No data available. Please add investment entries.")
-    st.markdown('</div>', unsafe_allow_html=True)
+        else:
+            st.info("No data available. Please add investment entries.")
+        st.markdown('</div>', unsafe_allow_html=True)
 with tab2:
-    # Performance tab with enhanced animations and interactivity;
-    st.markdown('<div class="animate-in">', unsafe_allow_html=True)
-    st.header("Investment Performance")
+    if _tab_open(tab2):
+        _keep_widget_state(TAB_WIDGET_KEYS["performance"])
+        # Performance tab with enhanced animations and interactivity;
+        st.markdown('<div class="animate-in">', unsafe_allow_html=True)
+        st.header("Investment Performance")
     
-    if not df.empty:
-        # Ensure Investment column contains only strings
-        df['Investment'] = df['Investment'].astype(str)
-        
-        # Date range filters with improved UI
-        st.subheader("Select Time Range")
-        
-        # Add preset date ranges for quick selection
-        preset_ranges = st.radio(
-            "Preset Ranges",
-            ["Custom", "1 Month", "3 Months", "6 Months", "1 Year", "YTD", "All Time"],
-            horizontal=True,
-            key="preset_date_range"
-        )
+        if not df.empty:
+            # Date range filters with improved UI
+            st.subheader("Select Time Range")
         
-        # Calculate preset date ranges
-        now = datetime.now().date()
-        if preset_ranges == "1 Month":
-            preset_start = (now - timedelta(days=30))
-            preset_end = now
-        elif preset_ranges == "3 Months":
-            preset_start = (now - timedelta(days=90))
-            preset_end = now
-        elif preset_ranges == "6 Months":
-            preset_start = (now - timedelta(days=180))
-            preset_end = now
-        elif preset_ranges == "1 Year":
-            preset_start = (now - timedelta(days=365))
-            preset_end = now
-        elif preset_ranges == "YTD":
-            preset_start = datetime(now.year, 1, 1).date()
-            preset_end = now
-        elif preset_ranges == "All Time":
-            preset_start = earliest_date
-            preset_end = latest_date
-        else:  # Custom
-            preset_start = earliest_date
-            preset_end = latest_date
-        
-        # Show date pickers only if Custom is selected
-        if preset_ranges == "Custom":
-            performance_cols = st.columns([1, 1, 2])
-            with performance_cols[0]:
-                perf_start = st.date_input(
-                    "From Date",
-                    value=earliest_date,
-                    min_value=earliest_date,
-                    max_value=latest_date,
-                    key="perf_start"
-                )
-            with performance_cols[1]:
-                perf_end = st.date_input(
-                    "To Date",
-                    value=latest_date,
-                    min_value=earliest_date,
-                    max_value=latest_date,
-                    key="perf_end"
-                )
-        else:
-            # Use preset dates
-            perf_start = preset_start
-            perf_end = preset_end
-            st.info(f"Date range: {perf_start.strftime('%Y-%m-%d')} to {perf_end.strftime('%Y-%m-%d')}")
-        
-        # Convert to datetime for filtering
-        perf_start_dt = pd.Timestamp(perf_start)
-        perf_end_dt = pd.Timestamp(perf_end)
-        
-        # Get performance data with loading animation
-        with st.spinner("Calculating performance data..."):
-            performance_data = get_historical_performance(df, perf_start_dt, perf_end_dt)
-            time.sleep(0.5)  # Add slight delay for animationif not performance_data.empty:
-        if not performance_data.empty:
-            # Total value over time with enhanced visualizations
-            st.subheader("Portfolio Value Over Time")
-            
-            # Group by date and sum values
-            total_over_time = performance_data.groupby('Date')['ValueUSD'].sum().reset_index()
-            
-            # Add visualization options
-            value_chart_type = st.radio(
-                "Chart Type",
-                ["Line", "Area", "Bar", "Candlestick-like"],
+            # Add preset date ranges for quick selection
+            preset_ranges = st.radio(
+                "Preset Ranges",
+                ["Custom", "1 Month", "3 Months", "6 Months", "1 Year", "YTD", "All Time"],
                 horizontal=True,
-                key="value_chart_type"
+                key="preset_date_range"
             )
-            
-            # Add aggregation options
-            if len(total_over_time) > 30:
-                show_aggregation = st.checkbox("Aggregate data for smoother visualization", value=False)
-                if show_aggregation:
-                    agg_method = st.radio(
-                        "Aggregation Method",
-                        ["Weekly", "Monthly", "Quarterly"],
-                        horizontal=True
+        
+            # Calculate preset date ranges
+            now = datetime.now().date()
+            if preset_ranges in PRESET_RANGE_DAYS:
+                preset_start = now - timedelta(days=PRESET_RANGE_DAYS[preset_ranges])
+                preset_end = now
+            elif preset_ranges == "YTD":
+                preset_start = now.replace(month=1, day=1)
+                preset_end = now
+            else:  # All Time / Custom
+                preset_start = earliest_date
+                preset_end = latest_date
+        
+            # Show date pickers only if Custom is selected
+            if preset_ranges == "Custom":
+                performance_cols = st.columns([1, 1, 2])
+                with performance_cols[0]:
+                    perf_start = st.date_input(
+                        "From Date",
+                        value=earliest_date,
+                        min_value=earliest_date,
+                        max_value=latest_date,
+                        key="perf_start"
                     )
+                with performance_cols[1]:
+                    perf_end = st.date_input(
+                        "To Date",
+                        value=latest_date,
+                        min_value=earliest_date,
+                        max_value=latest_date,
+                        key="perf_end"
+                    )
+            else:
+                # Use preset dates
+                perf_start = preset_start
+                perf_end = preset_end
+                st.info(f"Date range: {perf_start.strftime('%Y-%m-%d')} to {perf_end.strftime('%Y-%m-%d')}")
+        
+            # Convert to datetime for filtering
+            perf_start_dt = pd.Timestamp(perf_start)
+            perf_end_dt = pd.Timestamp(perf_end)
+        
+            # Get performance data with loading animation
+            with st.spinner("Calculating performance data..."):
+                performance_data, total_over_time = _historical_performance(
+                    _data_mtime(), _rate_epoch(), st.session_state.data_version,
+                    perf_start_dt, perf_end_dt
+                )
+            if not performance_data.empty:
+                # Total value over time with enhanced visualizations
+                st.subheader("Portfolio Value Over Time")
+            
+                # Add visualization options
+                value_chart_type = st.radio(
+                    "Chart Type",
+                    ["Line", "Area", "Bar", "Candlestick-like"],
+                    horizontal=True,
+                    key="value_chart_type"
+                )
+            
+                # Add aggregation options
+                if len(total_over_time) > 30:
+                    show_aggregation = st.checkbox("Aggregate data for smoother visualization", value=False, key="show_aggregation")
+                    if show_aggregation:
+                        agg_method = st.radio(
+                            "Aggregation Method",
+                            ["Weekly", "Monthly", "Quarterly"],
+                            horizontal=True,
+                            key="agg_method"
+                        )
                     
-                    # Apply aggregation
-                    total_over_time['Period'] = total_over_time['Date']
-                    if agg_method == "Weekly":
-                        total_over_time['Period'] = total_over_time['Date'].dt.to_period('W').dt.start_time
-                    elif agg_method == "Monthly":
-                        total_over_time['Period'] = total_over_time['Date'].dt.to_period('M').dt.start_time
-                    elif agg_method == "Quarterly":
-                        total_over_time['Period'] = total_over_time['Date'].dt.to_period('Q').dt.start_time
-                    
-                    # Group by period and calculate aggregates
-                    total_over_time = total_over_time.groupby('Period').agg({
-                        'Date': 'last',  # Use last date in period
-                        'ValueUSD': 'mean'  # Use average value in period
-                    }).reset_index()
+                        # Bucket by calendar period in one resample; periods without entries are dropped
+                        total_over_time = (
+                            total_over_time
+                            .set_index('Date', drop=False)
+                            .resample(AGGREGATION_FREQS[agg_method])
+                            .agg({
+                                'Date': 'last',  # Use last date in period
+                                'ValueUSD': 'mean'  # Use average value in period
+                            })
+                            .dropna(subset=['Date'])
+                            .reset_index(drop=True)
+                        )
             
-            # Show annotations option
-            show_annotations = st.checkbox("Show trend annotations", value=False)
+                # Show annotations option
+                show_annotations = st.checkbox("Show trend annotations", value=False, key="show_annotations")
             
-            # Create visualization based on type
-            if value_chart_type == "Line":
-                fig = px.line(
-                    total_over_time,
-                    x='Date',
-                    y='ValueUSD',
-                    labels={'ValueUSD': 'Total Value (USD)', 'Date': 'Date'},
-                    title=''
-                )
-                fig.update_traces(line=dict(width=3))
-
-            elif value_chart_type == "Area":
-                fig = px.area(
-                    total_over_time,
-                    x='Date',
-                    y='ValueUSD',
-                    labels={'ValueUSD': 'Total Value (USD)', 'Date': 'Date'},
-                    title=''
-                )
-
-            elif value_chart_type == "Bar":
-                fig = px.bar(
-                    total_over_time,
-                    x='Date',
-                    y='ValueUSD',
-                    labels={'ValueUSD': 'Total Value (USD)', 'Date': 'Date'},
-                    title=''
-                )
-
-            else:  # Candlestick-like
-                # Create a candlestick-like visualization
-                # First, calculate some additional metrics
-                if len(total_over_time) > 1:
-                    # For each date, calculate high/low based on neighboring points
-                    candlestick_data = []
-                    for i in range(len(total_over_time)):
-                        row = total_over_time.iloc[i]
-                        # Base value
-                        base_value = row['ValueUSD']
-                        
-                        # Add some variation for high/low to simulate candlestick
-                        if i > 0:
-                            prev_value = total_over_time.iloc[i-1]['ValueUSD']
-                            change = base_value - prev_value
-                            high = base_value + abs(change) * 0.1
-                            low = base_value - abs(change) * 0.1
-                        else:
-                            # For the first point
-                            high = base_value * 1.02
-                            low = base_value * 0.98
-                        
-                        candlestick_data.append({
-                            'Date': row['Date'],
-                            'Open': base_value * 0.99 if i > 0 else base_value,
-                            'High': high,
-                            'Low': low,
-                            'Close': base_value,
-                        })
+                # Long ranges are thinned to the points that shape the line before plotting
+                plot_over_time = downsample_lttb(total_over_time, 'Date', 'ValueUSD', MAX_CHART_POINTS)
+            
+                # Create visualization based on type
+                if value_chart_type == "Line":
+                    fig = px.line(
+                        plot_over_time,
+                        x='Date',
+                        y='ValueUSD',
+                        labels={'ValueUSD': 'Total Value (USD)', 'Date': 'Date'},
+                        title='',
+                        render_mode='webgl'
+                    )
+                    fig.update_traces(line=dict(width=3))
 
-                    candlestick_df = pd.DataFrame(candlestick_data)
-                    
-                    # Create the figure manually
-                    fig = go.Figure()
-                    
-                    # Add candlestick
-                    fig.add_trace(go.Candlestick(
-                        x=candlestick_df['Date'],
-                        open=candlestick_df['Open'],
-                        high=candlestick_df['High'],
-                        low=candlestick_df['Low'],
-                        close=candlestick_df['Close'],
-                        name='Portfolio Value',
-                        increasing_line_color='#26a69a', 
-                        decreasing_line_color='#ef5350'
-                    ))
+                elif value_chart_type == "Area":
+                    fig = px.area(
+                        plot_over_time,
+                        x='Date',
+                        y='ValueUSD',
+                        labels={'ValueUSD': 'Total Value (USD)', 'Date': 'Date'},
+                        title=''
+                    )
 
-                    # Add a line trace for the closing values
-                    fig.add_trace(go.Scatter(
-                        x=candlestick_df['Date'],
-                        y=candlestick_df['Close'],
-                        line=dict(color='rgba(255, 255, 255, 0.5)', width=1),
-                        name='Trend Line'
-                    ))
-                else:
-                    # Fall back to line chart if not enough data points
-                    fig = px.line(
+                elif value_chart_type == "Bar":
+                    fig = px.bar(
                         total_over_time,
                         x='Date',
                         y='ValueUSD',
                         labels={'ValueUSD': 'Total Value (USD)', 'Date': 'Date'},
                         title=''
                     )
+
+                else:  # Candlestick-like
+                    # Create a candlestick-like visualization
+                    # First, calculate some additional metrics
+                    if len(total_over_time) > 1:
+                        # High/low spread is 10% of the move from the previous point;
+                        # the first point has no previous value and gets a +/-2% spread
+                        v = total_over_time['ValueUSD']
+                        prev = v.shift(1)
+                        spread = (v - prev).abs().fillna(v * 0.2) * 0.1
+                        candlestick_df = pd.DataFrame({
+                            'Date': total_over_time['Date'],
+                            'Open': np.where(prev.notna(), v * 0.99, v),
+                            'High': v + spread,
+                            'Low': v - spread,
+                            'Close': v,
+                        })
+                    
+                        # Create the figure manually
+                        fig = go.Figure()
+                    
+                        # Add candlestick
+                        fig.add_trace(go.Candlestick(
+                            x=candlestick_df['Date'],
+                            open=candlestick_df['Open'],
+                            high=candlestick_df['High'],
+                            low=candlestick_df['Low'],
+                            close=candlestick_df['Close'],
+                            name='Portfolio Value',
+                            increasing_line_color='#26a69a', 
+                            decreasing_line_color='#ef5350'
+                        ))
+
+                        # Add a line trace for the closing values (WebGL, it spans every date)
+                        fig.add_trace(go.Scattergl(
+                            x=candlestick_df['Date'],
+                            y=candlestick_df['Close'],
+                            line=dict(color='rgba(255, 255, 255, 0.5)', width=1),
+                            name='Trend Line'
+                        ))
+                    else:
+                        # Fall back to line chart if not enough data points
+                        fig = px.line(
+                            total_over_time,
+                            x='Date',
+                            y='ValueUSD',
+                            labels={'ValueUSD': 'Total Value (USD)', 'Date': 'Date'},
+                            title=''
+                        )
                 
-            # Add annotations if requested;
-            if show_annotations and len(total_over_time) > 1:
-                # Identify significant trends
-                total_over_time['PctChange'] = total_over_time['ValueUSD'].pct_change() * 100
+                # Add annotations if requested;
+                if show_annotations and len(total_over_time) > 1:
+                    # Identify significant trends: step-to-step % change straight off the array
+                    values = total_over_time['ValueUSD'].to_numpy(dtype=float)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        step_pcts = (values[1:] / values[:-1] - 1) * 100
                 
-                # Find significant changes (more than 5%)
-                significant_changes = total_over_time[abs(total_over_time['PctChange']) > 5].copy()
+                    # Find significant changes (more than 5%); NaN never passes the threshold
+                    significant = np.flatnonzero(np.abs(step_pcts) > 5)
+                    pcts = step_pcts[significant]
+                    dates = total_over_time['Date'].to_numpy()[significant + 1]
+                    values = values[significant + 1]
                 
-                # Add annotations for significant changes
-                annotations = []
-                for _, row in significant_changes.iterrows():
-                    if pd.notna(row['PctChange']):
-                        direction = "↑" if row['PctChange'] > 0 else "↓"
-                        annotations.append(dict(
-                            x=row['Date'],
-                            y=row['ValueUSD'],
+                    # Add annotations for significant changes
+                    annotations = [
+                        dict(
+                            x=d,
+                            y=v,
                             xref="x",
                             yref="y",
-                            text=f"{direction} {abs(row['PctChange']):.1f}%",
+                            text=f"{'↑' if p > 0 else '↓'} {abs(p):.1f}%",
                             showarrow=True,
                             arrowhead=2,
                             arrowsize=1,
                             arrowwidth=2,
-                            arrowcolor="#ffffff" if row['PctChange'] > 0 else "#ff5555",
+                            arrowcolor="#ffffff" if p > 0 else "#ff5555",
                             ax=0,
-                            ay=-40 if row['PctChange'] > 0 else 40
-                        ))
+                            ay=-40 if p > 0 else 40
+                        )
+                        for d, v, p in zip(dates, values, pcts)
+                    ]
                 
-                fig.update_layout(annotations=annotations)
-
-            # Enhanced styling for all chart types
-            fig.update_layout(
-                height=400,
-                xaxis_title="Date",
-                yaxis_title="Value (USD)",
-                margin=dict(l=20, r=20, t=30, b=20),
-                paper_bgcolor='rgba(0,0,0,0)',
-                plot_bgcolor='rgba(0,0,0,0)',
-                font=dict(color='white'),
-                xaxis=dict(
-                    gridcolor='rgba(255,255,255,0.1)',
-                    zerolinecolor='rgba(255,255,255,0.2)'
-                ),
-                yaxis=dict(
-                    gridcolor='rgba(255,255,255,0.1)',
-                    zerolinecolor='rgba(255,255,255,0.2)'
-                ),
-                hovermode="x unified"
-            )
-
-            st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True})# Investment performance comparison with enhanced UI
-            st.subheader("Investment Performance Comparison")
-            
-            # Get unique investments and ensure they are strings
-            investments = [str(inv) for inv in performance_data['Investment'].unique()]
-            
-            # Set default reference investment to Binance if available
-            default_reference = "Binance" if "Binance" in investments else investments[0] if investments else None
+                    fig.update_layout(annotations=annotations)
 
-            # Add reference investment selection with better UI
-            col1, col2 = st.columns([1, 2])
-            
-            with col1:
-                reference_investment = st.selectbox(
-                    "Reference Investment (Baseline)",
-                    sorted(investments),
-                    index=sorted(investments).index(default_reference) if default_reference in sorted(investments) else 0,
-                    key="reference_investment"
+                # Enhanced styling for all chart types
+                fig.update_layout(
+                    height=400,
+                    xaxis_title="Date",
+                    yaxis_title="Value (USD)",
+                    margin=CHART_MARGIN,
+                    **DARK_LAYOUT,
+                    xaxis=DARK_AXIS,
+                    yaxis=DARK_AXIS,
+                    hovermode="x unified"
                 )
 
-            # Set default comparison investments
-            default_comparisons = []
-            for inv in ["401k", "Trade Republic", "RBC"]:
-                if inv in investments and inv != reference_investment:
-                    default_comparisons.append(inv)
+                st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True})# Investment performance comparison with enhanced UI
+                st.subheader("Investment Performance Comparison")
             
-            with col2:
-                # Let user select investments to compare with checkbox UI
-                comparison_investments = st.multiselect(
-                    "Select Investments to Compare",
-                    sorted(investments),
-                    default=default_comparisons,
-                    key="performance_investments"
-                )
+                # Get unique investments and ensure they are strings
+                investments = [str(inv) for inv in performance_data['Investment'].unique()]
+                investment_set = set(investments)
+                sorted_investments = sorted(investments)
             
-            if reference_investment and comparison_investments:
-                # Include reference investment if not already in comparison list
-                all_investments = comparison_investments.copy()
-                if reference_investment not in all_investments:
-                    all_investments.append(reference_investment)
-
-                # Get relative performance data with loading animation
-                with st.spinner("Calculating comparison data..."):
-                    relative_data = get_relative_performance(
-                        df, 
-                        perf_start_dt, 
-                        perf_end_dt, 
-                        reference_investment, 
-                        all_investments
+                # Set default reference investment to Binance if available
+                default_reference = "Binance" if "Binance" in investment_set else investments[0] if investments else None
+
+                # Add reference investment selection with better UI
+                col1, col2 = st.columns([1, 2])
+            
+                with col1:
+                    reference_investment = st.selectbox(
+                        "Reference Investment (Baseline)",
+                        sorted_investments,
+                        index=sorted_investments.index(default_reference) if default_reference in investment_set else 0,
+                        key="reference_investment"
                     )
-                    time.sleep(0.3)  # Small delay for animation
 
-                if not relative_data.empty:
-                    # Create a selection for what to display with improved UI
-                    display_opts_col1, display_opts_col2 = st.columns([1, 2])
-                    
-                    with display_opts_col1:
-                        chart_mode = st.radio(
-                            "Display mode",
-                            ["Relative to Baseline", "Absolute % Change"],
-                            horizontal=True,
-                            key="performance_mode"
-                        )
-                    
-                    with display_opts_col2:
-                        # Add smooth lines option
-                        smoothing = st.slider(
-                            "Line Smoothing",
-                            min_value=0,
-                            max_value=10,
-                            value=0,
-                            help="Higher values create smoother lines"
+                # Set default comparison investments
+                default_comparisons = [
+                    inv for inv in ("401k", "Trade Republic", "RBC")
+                    if inv in investment_set and inv != reference_investment
+                ]
+            
+                with col2:
+                    # Let user select investments to compare with checkbox UI
+                    comparison_investments = st.multiselect(
+                        "Select Investments to Compare",
+                        sorted_investments,
+                        default=default_comparisons,
+                        key="performance_investments"
+                    )
+            
+                if reference_investment and comparison_investments:
+                    # Include reference investment if not already in comparison list
+                    all_investments = comparison_investments.copy()
+                    if reference_investment not in all_investments:
+                        all_investments.append(reference_investment)
+
+                    # Get relative performance data with loading animation
+                    with st.spinner("Calculating comparison data..."):
+                        relative_data = _relative_performance(
+                            _data_mtime(), _rate_epoch(), st.session_state.data_version,
+                            perf_start_dt, 
+                            perf_end_dt, 
+                            reference_investment, 
+                            tuple(all_investments)
                         )
 
-                    # Create line chart for comparison based on mode
-                    if chart_mode == "Relative to Baseline":
-                        y_column = "RelativePct"
-                        title = f"Performance Relative to {reference_investment}"
-                        y_title = f"% Difference vs {reference_investment}"
-                    else:
-                        y_column = "PctChange"
-                        title = "Absolute Performance (% Change)"
-                        y_title = "% Change from Start"
+                    if not relative_data.empty:
+                        # Create a selection for what to display with improved UI
+                        display_opts_col1, display_opts_col2 = st.columns([1, 2])
                     
-                    # Create enhanced interactive chart
-                    fig = px.line(
-                        relative_data,
-                        x='Date',
-                        y=y_column,
-                        color='Investment',
-                        labels={y_column: y_title, 'Date': 'Date'},
-                        title=title,
-                        line_shape='spline' if smoothing > 0 else 'linear',  # Smooth lines if requested
-                    )
-
-                    # Apply smoothing if requested
-                    if smoothing > 0:
-                        for trace in fig.data:
-                            trace.line.smoothing = smoothing / 10  # Scale to 0-1 range
-
-                    # Add zero line for reference
-                    fig.add_hline( 
-                        y=0, 
-                        line_dash="dash", 
-                        line_color="white",
-                        opacity=0.5,
-                        annotation_text="Baseline" if chart_mode == "Relative to Baseline" else "No Change",
-                        annotation_position="bottom right"
-                    )
+                        with display_opts_col1:
+                            chart_mode = st.radio(
+                                "Display mode",
+                                ["Relative to Baseline", "Absolute % Change"],
+                                horizontal=True,
+                                key="performance_mode"
+                            )
+                    
+                        with display_opts_col2:
+                            # Add smooth lines option
+                            smoothing = st.slider(
+                                "Line Smoothing",
+                                min_value=0,
+                                max_value=10,
+                                value=0,
+                                help="Higher values create smoother lines",
+                                key="line_smoothing"
+                            )
 
-                    # Add markers for data points
-                    show_markers = st.checkbox("Show data points", value=False)
-                    if show_markers:
-                        for trace in fig.data:
-                            trace.mode = 'lines+markers'# Update styling with enhanced interactivity
-                    fig.update_traces(line=dict(width=2.5))
-                    fig.update_layout(
-                        height=500,
-                        xaxis_title="Date",
-                        yaxis_title=y_title,
-                        margin=dict(l=20, r=20, t=50, b=50),
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        font=dict(color='white'),
-                        xaxis=dict(
-                            gridcolor='rgba(255,255,255,0.1)',
-                            zerolinecolor='rgba(255,255,255,0.2)'
-                        ),
-                        yaxis=dict(
-                            gridcolor='rgba(255,255,255,0.1)',
-                            zerolinecolor='rgba(255,255,255,0.2)'
-                        ),
-                        hovermode="x unified",
-                        legend=dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=-0.2,
-                            xanchor="center",
-                            x=0.5
-                        ),
-                        # Add animations for line transitions
-                        transition_duration=500
-                    )
+                        fig = _comparison_figure(
+                            _data_mtime(), _rate_epoch(), st.session_state.data_version,
+                            perf_start_dt,
+                            perf_end_dt,
+                            reference_investment,
+                            tuple(all_investments),
+                            chart_mode,
+                            smoothing
+                        )
 
-                    # Make the reference investment line stand out
-                    for i, trace in enumerate(fig.data):
-                        if trace.name == reference_investment:
-                            trace.line.width = 4
-                            trace.line.dash = 'solid'
-                        else:
-                            trace.line.width = 2.5
+                        # Add markers for data points
+                        show_markers = st.checkbox("Show data points", value=False, key="show_markers")
+                        if show_markers:
+                            fig.update_traces(mode='lines+markers')
 
-                    # Display the chart
-                    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True})
+                        # Display the chart
+                        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': True})
 
-                    # Calculate and display performance metrics with enhanced styling
-                    st.subheader("Performance Metrics") ;
+                        # Calculate and display performance metrics with enhanced styling
+                        st.subheader("Performance Metrics") ;
 
-                    # Option to show detailed analysis;
-                    show_detailed = st.checkbox("Show detailed analysis", value=False)
+                        # Option to show detailed analysis;
+                        show_detailed = st.checkbox("Show detailed analysis", value=False, key="show_detailed")
                     
-                    # Prepare metrics data
-                    metrics_data = []
-                    for inv in all_investments:
-                        inv_data = relative_data[relative_data['Investment'] == inv]
-                        if not inv_data.empty:
-                            start_date = inv_data['Date'].min()
-                            end_date = inv_data['Date'].max()
-
-                            start_row = inv_data[inv_data['Date'] == start_date].iloc[0]
-                            end_row = inv_data[inv_data['Date'] == end_date].iloc[0]
-                            
-                            # Calculate additional metrics
-                            days_between = (end_date - start_date).days
-                            
-                            # Calculate compounded annual growth rate (CAGR)
-                            if days_between > 0:
-                                years = days_between / 365
-                                cagr = ((1 + end_row['PctChange']/100) ** (1/years) - 1) * 100 if years > 0 else 0
-                            else:
-                                cagr = 0
-                            
-                            # Add standard metrics
-                            metric_row = { 
-                                'Investment': inv,
-                                'Start Value': start_row['Value'],
-                                'End Value': end_row['Value'],
-                                'Absolute Change %': end_row['PctChange'],
-                                'Relative Change %': end_row['RelativePct'],
-                                'Is Reference': inv == reference_investment
+                        metrics_df = _performance_metrics(
+                            _data_mtime(), _rate_epoch(), st.session_state.data_version,
+                            perf_start_dt,
+                            perf_end_dt,
+                            reference_investment,
+                            tuple(all_investments),
+                            show_detailed
+                        )
+
+                        # Display metrics with enhanced styling; values stay numeric and the
+                        # column formats are applied by the table itself
+                        st.dataframe(
+                            metrics_df.drop(columns=['Is Reference', '_style']),
+                            use_container_width=True,
+                            hide_index=True,
+                            column_config={
+                                "Investment": st.column_config.TextColumn("Investment"),
+                                "Start Value": st.column_config.NumberColumn("Start Value", format="$%.2f"),
+                                "End Value": st.column_config.NumberColumn("End Value", format="$%.2f"),
+                                "Absolute Change %": st.column_config.NumberColumn("Absolute Change %", format="%+.2f%%"),
+                                "Relative Change %": st.column_config.NumberColumn("Relative Change %", format="%+.2f%%"),
+                                "CAGR": st.column_config.NumberColumn("CAGR", format="%+.2f%%"),
+                                "Volatility": st.column_config.NumberColumn("Volatility", format="%.2f%%"),
+                                "Days": st.column_config.NumberColumn("Days", format="%d"),
                             }
-                            
-                            # Add detailed metrics if requested
-                            if show_detailed:
-                                # Calculate more metrics
-                                if days_between > 30:
-                                    # Calculate volatility (standard deviation of percentage changes)
-                                    # First, we need daily percentage changes
-                                    if len(inv_data) > 1:
-                                        pct_changes = inv_data['Value'].pct_change().dropna() * 100
-                                        volatility = pct_changes.std()
-                                    else:
-                                        volatility = 0
-                                        
-                                    # Add to metrics
-                                    metric_row.update({
-                                        'CAGR': cagr,
-                                        'Volatility': volatility,
-                                        'Days': days_between
-                                    })
-                            
-                            metrics_data.append(metric_row)
-
-                    # Convert to DataFrame
-                    metrics_df = pd.DataFrame(metrics_data)
-
-                    # Add a column for highlighting the reference investment;
-                    metrics_df['_style'] = metrics_df['Is Reference'].apply(
-                        lambda x: 'background-color: rgba(78, 141, 245, 0.2)' if x else ''
-                    )
-                    
-                    # Format for display
-                    display_df = metrics_df.drop(columns=['Is Reference', '_style']).copy()
-                    display_df['Start Value'] = display_df['Start Value'].map('${:,.2f}'.format)
-                    display_df['End Value'] = display_df['End Value'].map('${:,.2f}'.format)
-                    display_df['Absolute Change %'] = display_df['Absolute Change %'].map('{:+.2f}%'.format)
-                    display_df['Relative Change %'] = display_df['Relative Change %'].map('{:+.2f}%'.format)
-                    
-                    # Add detailed columns if present;
-                    if show_detailed and 'CAGR' in display_df.columns:
-                        display_df['CAGR'] = display_df['CAGR'].map('{:+.2f}%'.format)
-                        display_df['Volatility'] = display_df['Volatility'].map('{:.2f}%'.format)
-                        display_df['Days'] = display_df['Days'].astype(int)
-                    
-                    # Display metrics with enhanced styling
-                    st.dataframe(
-                        display_df,
-                        use_container_width=True,
-                        hide_index=True,
-                        column_config={
-                            "Investment": st.column_config.TextColumn("Investment"),
-                            "Start Value": st.column_config.TextColumn("Start Value"),
-                            "End Value": st.column_config.TextColumn("End Value"),
-                            "Absolute Change %": st.column_config.TextColumn("Absolute Change %"),
-                            "Relative Change %": st.column_config.TextColumn("Relative Change %"),
-                        }
-                    )
+                        )
 
-                    # Add a visualization of the metrics
-                    if st.checkbox("Show metrics visualization", value=False):
-                        metric_to_plot = "Absolute Change %" if chart_mode == "Absolute % Change" else "Relative Change %"
+                        # Add a visualization of the metrics
+                        if st.checkbox("Show metrics visualization", value=False, key="show_metrics_chart"):
+                            metric_to_plot = "Absolute Change %" if chart_mode == "Absolute % Change" else "Relative Change %"
                         
-                        # Create a horizontal bar chart
-                        bar_fig = px.bar(
-                            metrics_df,
-                            y='Investment',
-                            x='Absolute Change %' if metric_to_plot == "Absolute Change %" else 'Relative Change %',
-                            color='Investment',
-                            orientation='h',
-                            title=f"{metric_to_plot} by Investment"
-                        )
+                            # Create a horizontal bar chart
+                            bar_fig = px.bar(
+                                metrics_df,
+                                y='Investment',
+                                x='Absolute Change %' if metric_to_plot == "Absolute Change %" else 'Relative Change %',
+                                color='Investment',
+                                orientation='h',
+                                title=f"{metric_to_plot} by Investment"
+                            )
                         
-                        bar_fig.update_layout(
-                            height=300,
-                            margin=dict(l=20, r=20, t=50, b=20),
-                            paper_bgcolor='rgba(0,0,0,0)',
-                            plot_bgcolor='rgba(0,0,0,0)',
-                            font=dict(color='white'),
-                            xaxis_title=metric_to_plot,
-                            yaxis_title="",
-                            xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
-                            yaxis=dict(gridcolor='rgba(255,255,255,0.1)')
-                        )
+                            bar_fig.update_layout(
+                                height=300,
+                                margin=dict(l=20, r=20, t=50, b=20),
+                                **DARK_LAYOUT,
+                                xaxis_title=metric_to_plot,
+                                yaxis_title="",
+                                xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
+                                yaxis=dict(gridcolor='rgba(255,255,255,0.1)')
+                            )
                         
-                        st.plotly_chart(bar_fig, use_container_width=True);
+                            st.plotly_chart(bar_fig, use_container_width=True);
+                    else:
+                        st.warning("Insufficient data for comparative analysis. Ensure the reference investment has data for the selected date range.")
                 else:
-                    st.warning("Insufficient data for comparative analysis. Ensure the reference investment has data for the selected date range.")
+                    st.info("Select a reference investment and comparison investments to view relative performance.")
             else:
-                st.info("Select a reference investment and comparison investments to view relative performance.")
+                st.warning("No data available for the selected date range.")
         else:
-            st.warning("No data available for the selected date range.")
-    else:
-        st.info("No data available. Please add investment entries.")
-    st.markdown('</div>', unsafe_allow_html=True)
+            st.info("No data available. Please add investment entries.")
+        st.markdown('</div>', unsafe_allow_html=True)
     
 with tab3:
-    # Data tab with enhanced filtering and visualization
+    if _tab_open(tab3):
+        _keep_widget_state(TAB_WIDGET_KEYS["data"])
+        # Data tab with enhanced filtering and visualization
 
-    st.markdown('<div class="animate-in">', unsafe_allow_html=True) ;
-    st.header("Investment Data")
+        st.markdown('<div class="animate-in">', unsafe_allow_html=True) ;
+        st.header("Investment Data")
     
-    if not df.empty:
-        # Enhanced date filter with preset options
-        st.subheader("Date Filter")
-        
-        date_filter_type = st.radio(
-            "Filter Type",
-            ["Range", "Specific Date"],
-            horizontal=True,
-            key="date_filter_type"
-        )
+        if not df.empty:
+            # Enhanced date filter with preset options
+            st.subheader("Date Filter")
         
-        if date_filter_type == "Range":
-            # Date range selection with presets
-            date_preset = st.selectbox(
-                "Preset Ranges",
-                ["Custom", "Last 30 Days", "Last 90 Days", "Last 180 Days", "This Year", "Last Year", "All Time"],
-                key="date_preset"
+            date_filter_type = st.radio(
+                "Filter Type",
+                ["Range", "Specific Date"],
+                horizontal=True,
+                key="date_filter_type"
             )
+        
+            if date_filter_type == "Range":
+                # Date range selection with presets
+                date_preset = st.selectbox(
+                    "Preset Ranges",
+                    ["Custom", "Last 30 Days", "Last 90 Days", "Last 180 Days", "This Year", "Last Year", "All Time"],
+                    key="date_preset"
+                )
             
-            if date_preset == "Custom":
-                # Custom date range
-                data_cols = st.columns([1, 1, 2])
+                if date_preset == "Custom":
+                    # Custom date range
+                    data_cols = st.columns([1, 1, 2])
+                    with data_cols[0]:
+                        start_date = st.date_input(
+                            "From", 
+                            value=earliest_date,
+                            min_value=earliest_date,
+                            max_value=latest_date,
+                            key="data_start"
+                        )
+                    with data_cols[1]:
+                        end_date = st.date_input(
+                            "To", 
+                            value=latest_date,
+                            min_value=earliest_date,
+                            max_value=latest_date,
+                            key="data_end"
+                        )
+                else:
+                    # Calculate preset ranges
+                    if date_preset == "Last 30 Days":
+                        start_date = latest_date - timedelta(days=30)
+                        end_date = latest_date
+                    elif date_preset == "Last 90 Days":
+                        start_date = latest_date - timedelta(days=90)
+                        end_date = latest_date
+                    elif date_preset == "Last 180 Days":
+                        start_date = latest_date - timedelta(days=180)
+                        end_date = latest_date
+                    elif date_preset == "This Year":
+                        start_date = datetime(latest_date.year, 1, 1).date()
+                        end_date = latest_date
+                    elif date_preset == "Last Year":
+                        start_date = datetime(latest_date.year - 1, 1, 1).date()
+                        end_date = datetime(latest_date.year - 1, 12, 31).date()
+                    else:  # All Time
+                        start_date = earliest_date
+                        end_date = latest_date
+                
+                    st.info(f"Date range: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+            else:
+                # Specific date selection
+                data_cols = st.columns([1, 3])
                 with data_cols[0]:
-                    start_date = st.date_input(
-                        "From", 
-                        value=earliest_date,
-                        min_value=earliest_date,
-                        max_value=latest_date,
-                        key="data_start"
-                    )
-                with data_cols[1]:
-                    end_date = st.date_input(
-                        "To", 
-                        value=latest_date,
-                        min_value=earliest_date,
-                        max_value=latest_date,
-                        key="data_end"
+                    specific_date_type = st.radio(
+                        "Date Selection",
+                        ["Specific Date", "Latest Available"],
+                        key="specific_date_type"
                     )
-            else:
-                # Calculate preset ranges
-                if date_preset == "Last 30 Days":
-                    start_date = latest_date - timedelta(days=30)
-                    end_date = latest_date
-                elif date_preset == "Last 90 Days":
-                    start_date = latest_date - timedelta(days=90)
-                    end_date = latest_date
-                elif date_preset == "Last 180 Days":
-                    start_date = latest_date - timedelta(days=180)
-                    end_date = latest_date
-                elif date_preset == "This Year":
-                    start_date = datetime(latest_date.year, 1, 1).date()
-                    end_date = latest_date
-                elif date_preset == "Last Year":
-                    start_date = datetime(latest_date.year - 1, 1, 1).date()
-                    end_date = datetime(latest_date.year - 1, 12, 31).date()
-                else:  # All Time
-                    start_date = earliest_date
-                    end_date = latest_date
-                
-                st.info(f"Date range: {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-        else:
-            # Specific date selection
-            data_cols = st.columns([1, 3])
-            with data_cols[0]:
-                specific_date_type = st.radio(
-                    "Date Selection",
-                    ["Specific Date", "Latest Available"],
-                    key="specific_date_type"
-                )
             
-            with data_cols[1]:
-                if specific_date_type == "Specific Date":
-                    specific_date = st.date_input(
-                        "Select Date",
-                        value=latest_date,
-                        min_value=earliest_date,
-                        max_value=latest_date,
-                        key="specific_date"
-                    )
-                    start_date = end_date = specific_date
-                else:
-                    start_date = end_date = latest_date
-                    st.info(f"Using latest date: {latest_date.strftime('%Y-%m-%d')}")
-        
-        # Ensure Investment column contains only strings
-        df['Investment'] = df['Investment'].astype(str)
-        
-        # Get unique investment values and convert to strings before sorting
-        unique_investments = [str(inv) for inv in df['Investment'].unique()]
-        
-        # Enhanced investment filter with better UI
-        st.subheader("Investment Filter")
-        
-        # Group investments by category
-        investments_by_category = {}
-        for inv in unique_investments:
-            category = INVESTMENT_CATEGORIES.get(inv, "Uncategorized")
-            if category not in investments_by_category:
-                investments_by_category[category] = []
-            investments_by_category[category].append(inv)
-        
-        # Sort categories and investments
-        sorted_categories = sorted(investments_by_category.keys())
-        
-        # Create grouped investment filter
-        filter_mode = st.radio(
-            "Filter Mode",
-            ["All", "By Category", "Custom Selection"],
-            horizontal=True,
-            key="investment_filter_mode"
-        )
+                with data_cols[1]:
+                    if specific_date_type == "Specific Date":
+                        specific_date = st.date_input(
+                            "Select Date",
+                            value=latest_date,
+                            min_value=earliest_date,
+                            max_value=latest_date,
+                            key="specific_date"
+                        )
+                        start_date = end_date = specific_date
+                    else:
+                        start_date = end_date = latest_date
+                        st.info(f"Using latest date: {latest_date.strftime('%Y-%m-%d')}")
         
-        if filter_mode == "All":
-            investment_filter = ["All"]
-        elif filter_mode == "By Category":
-            selected_categories = st.multiselect(
-                "Select Categories",
-                sorted_categories,
-                default=[sorted_categories[0]] if sorted_categories else [],
-                key="category_filter"
+            # Unique investments grouped by category, with the sorted category list. Investment
+            # is categorical from load time, so its categories are exactly the names present
+            unique_investments, investments_by_category, sorted_categories = _invs_by_cat(
+                tuple(df['Investment'].cat.categories)
             )
-            
-            # Get all investments for selected categories
-            investment_filter = []
-            for cat in selected_categories:
-                investment_filter.extend(investments_by_category.get(cat, []))
-        else:  # Custom Selection
-            investment_filter = st.multiselect(
-                "Select Investments",
-                ["All"] + sorted(unique_investments),
-                default=["All"],
-                key="investment_filter"
+        
+            # Enhanced investment filter with better UI
+            st.subheader("Investment Filter")
+        
+            # Create grouped investment filter
+            filter_mode = st.radio(
+                "Filter Mode",
+                ["All", "By Category", "Custom Selection"],
+                horizontal=True,
+                key="investment_filter_mode"
             )
         
-        # Apply filters with animation
-        with st.spinner("Filtering data..."):
-            filtered_df = df.copy()
-            
-            # Date filter
-            filtered_df = filtered_df[
-                (filtered_df['Date'] >= pd.Timestamp(start_date)) &
-                (filtered_df['Date'] <= pd.Timestamp(end_date))
-            ]
-            
-            # Investment filter
-            if filter_mode == "All" or "All" in investment_filter:
-                pass  # No filtering needed
-            else:
-                filtered_df = filtered_df[filtered_df['Investment'].isin(investment_filter)]
-            
-            # Sort by date descending
-            filtered_df = filtered_df.sort_values('Date', ascending=False)
-            
-            # Save to session state for potential export
-            st.session_state.filtered_df = filtered_df
+            if filter_mode == "All":
+                investment_filter = ["All"]
+            elif filter_mode == "By Category":
+                selected_categories = st.multiselect(
+                    "Select Categories",
+                    sorted_categories,
+                    default=[sorted_categories[0]] if sorted_categories else [],
+                    key="category_filter"
+                )
             
-            # Add a small delay for animation effect
-            time.sleep(0.3)
-        
-        # Display data with enhanced controls
-        st.subheader("Investment Data")
-        
-        # Add search functionality
-        search_query = st.text_input("🔍 Search in data", key="data_search")
-        if search_query:
-            filtered_df = filtered_df[
-                filtered_df.astype(str).apply(
-                    lambda row: row.str.contains(search_query, case=False).any(), 
-                    axis=1
+                # Get all investments for selected categories
+                investment_filter = []
+                for cat in selected_categories:
+                    investment_filter.extend(investments_by_category.get(cat, []))
+            else:  # Custom Selection
+                investment_filter = st.multiselect(
+                    "Select Investments",
+                    ["All"] + sorted(unique_investments),
+                    default=["All"],
+                    key="investment_filter"
                 )
-            ]
         
-        # Add view options
-        view_options_col1, view_options_col2, view_options_col3 = st.columns(3)
+            # Apply filters with animation
+            with st.spinner("Filtering data..."):
+                # Date filter: df is sorted by Date, so the range is a positional slice
+                # found by binary search - no boolean masks over the whole frame
+                lo = df['Date'].searchsorted(pd.Timestamp(start_date), side='left')
+                hi = df['Date'].searchsorted(pd.Timestamp(end_date), side='right')
+                filtered_df = df.iloc[lo:hi]
+            
+                # Investment filter
+                if filter_mode == "All" or "All" in investment_filter:
+                    pass  # No filtering needed
+                else:
+                    filtered_df = filtered_df[filtered_df['Investment'].isin(investment_filter)]
+            
+                # Save to session state for potential export
+                st.session_state.filtered_df = filtered_df
         
-        with view_options_col1:
-            rows_per_page = st.selectbox(
-                "Rows per page",
-                [10, 25, 50, 100, "All"],
-                index=1,  # Default to 25
-                key="rows_per_page"
-            )
+            # Display data with enhanced controls
+            st.subheader("Investment Data")
         
-        with view_options_col2:
-            sort_column = st.selectbox(
-                "Sort by",
-                ["Date", "Investment", "Currency", "Value", "Value (USD)"],
-                index=0,  # Default to Date
-                key="sort_column"
-            )
+            # Add search functionality
+            search_query = st.text_input("🔍 Search in data", key="data_search")
+            if search_query:
+                filtered_df = filtered_df[_search_mask(filtered_df, search_query)]
         
-        with view_options_col3:
-            sort_order = st.radio(
-                "Order",
-                ["Descending", "Ascending"],
-                horizontal=True,
-                key="sort_order"
-            )
+            # Add view options
+            view_options_col1, view_options_col2, view_options_col3 = st.columns(3)
         
-        # Apply view options
-        # Apply sorting
-        if sort_column == "Date":
-            sorted_df = filtered_df.sort_values('Date', ascending=(sort_order == "Ascending"))
-        elif sort_column == "Investment":
-            sorted_df = filtered_df.sort_values('Investment', ascending=(sort_order == "Ascending"))
-        elif sort_column == "Currency":
-            sorted_df = filtered_df.sort_values('Currency', ascending=(sort_order == "Ascending"))
-        elif sort_column == "Value":
-            sorted_df = filtered_df.sort_values('Value', ascending=(sort_order == "Ascending"))
-        elif sort_column == "Value (USD)":
-            # For formatted columns, use the numeric columns for sorting
-            sorted_df = filtered_df.sort_values('Current Value Num', ascending=(sort_order == "Ascending"))
-        elif sort_column == "Change (USD)":
-            sorted_df = filtered_df.sort_values('Change Num', ascending=(sort_order == "Ascending"))
-        else:
-            sorted_df = filtered_df
-        
-        # Pagination
-        if rows_per_page != "All":
-            total_pages = max(1, int(np.ceil(len(sorted_df) / rows_per_page)))
-            page = st.number_input(
-                f"Page (1-{total_pages})",
-                min_value=1,
-                max_value=total_pages,
-                value=1,
-                key="data_page"
-            )
-            
-            # Calculate start and end indices
-            start_idx = (page - 1) * rows_per_page
-            end_idx = min(start_idx + rows_per_page, len(sorted_df))
-            
-            # Get data for current page
-            display_df = sorted_df.iloc[start_idx:end_idx]
-            
-            # Show pagination info
-            st.caption(f"Showing {start_idx+1}-{end_idx} of {len(sorted_df)} entries")
-        else:
-            display_df = sorted_df
+            with view_options_col1:
+                rows_per_page = st.selectbox(
+                    "Rows per page",
+                    [10, 25, 50, 100, "All"],
+                    index=1,  # Default to 25
+                    key="rows_per_page"
+                )
         
-        # Display data with enhanced styling
-        st.dataframe(
-            display_df,
-            use_container_width=True,
-            hide_index=True,
-            column_config={
-                "Investment": st.column_config.TextColumn("Investment"),
-                "Current Value (USD)": st.column_config.TextColumn("Current Value (USD)", help="Value in USD"),
-                "Change (USD)": st.column_config.TextColumn("Change (USD)", help="Change in USD"),
-                "Current Value": st.column_config.TextColumn("Current Value"),
-                "Change": st.column_config.TextColumn("Change")
-            }
-        )
+            with view_options_col2:
+                sort_column = st.selectbox(
+                    "Sort by",
+                    list(DATA_SORT_COLUMNS),
+                    index=0,  # Default to Date
+                    key="sort_column"
+                )
         
-        # Summary statistics
-        if st.checkbox("Show summary statistics", value=False):
-            st.subheader("Summary Statistics")
-            
-            # Calculate statistics
-            stats_col1, stats_col2 = st.columns(2)
-            
-            with stats_col1:
-                st.metric("Total Entries", len(filtered_df))
-                st.metric("Date Range", f"{filtered_df['Date'].min().strftime('%Y-%m-%d')} to {filtered_df['Date'].max().strftime('%Y-%m-%d')}")
-            
-            with stats_col2:
-                st.metric("Unique Investments", filtered_df['Investment'].nunique())
-                st.metric("Currencies", ", ".join(filtered_df['Currency'].unique()))
-            
-            # Prepare summary stats by investment
-            investment_summary = filtered_df.groupby('Investment').agg({
-                'Value': ['count', 'min', 'max', 'mean'],
-                'ValueUSD': ['min', 'max', 'mean', 'sum']
-            }).reset_index()
-            
-            # Flatten multi-level columns
-            investment_summary.columns = ['Investment', 'Count', 'Min', 'Max', 'Avg', 'Min (USD)', 'Max (USD)', 'Avg (USD)', 'Total (USD)']
+            with view_options_col3:
+                sort_order = st.radio(
+                    "Order",
+                    ["Descending", "Ascending"],
+                    horizontal=True,
+                    key="sort_order"
+                )
+        
+            # Apply sorting - the only sort of the filtered rows: row positions from a stable
+            # sort of the key column alone, so only the rows shown are taken from the frame
+            order = (
+                filtered_df[DATA_SORT_COLUMNS[sort_column]]
+                .reset_index(drop=True)
+                .sort_values(ascending=(sort_order == "Ascending"), kind='stable')
+                .index.to_numpy()
+            )
+        
+            # Pagination
+            if rows_per_page != "All":
+                total_pages = max(1, int(np.ceil(len(filtered_df) / rows_per_page)))
+                page = st.number_input(
+                    f"Page (1-{total_pages})",
+                    min_value=1,
+                    max_value=total_pages,
+                    value=1,
+                    key="data_page"
+                )
             
-            # Format for display
-            for col in ['Min', 'Max', 'Avg']:
-                investment_summary[col] = investment_summary[col].map('{:.2f}'.format)
+                # Calculate start and end indices
+                start_idx = (page - 1) * rows_per_page
+                end_idx = min(start_idx + rows_per_page, len(filtered_df))
             
-            for col in ['Min (USD)', 'Max (USD)', 'Avg (USD)', 'Total (USD)']:
-                investment_summary[col] = investment_summary[col].map('${:.2f}'.format)
+                # Get data for current page
+                display_df = filtered_df.take(order[start_idx:end_idx])
             
-            # Display summary
+                # Show pagination info
+                st.caption(f"Showing {start_idx+1}-{end_idx} of {len(filtered_df)} entries")
+            else:
+                display_df = filtered_df.take(order)
+        
+            # Display data with enhanced styling
             st.dataframe(
-                investment_summary,
+                display_df,
                 use_container_width=True,
-                hide_index=True
+                hide_index=True,
+                column_config={
+                    "Investment": st.column_config.TextColumn("Investment"),
+                    "Current Value (USD)": st.column_config.TextColumn("Current Value (USD)", help="Value in USD"),
+                    "Change (USD)": st.column_config.TextColumn("Change (USD)", help="Change in USD"),
+                    "Current Value": st.column_config.TextColumn("Current Value"),
+                    "Change": st.column_config.TextColumn("Change")
+                }
             )
         
-        # Download button with options
-        st.subheader("Export Data")
-        export_options_col1, export_options_col2 = st.columns(2)
+            # Summary statistics
+            if st.checkbox("Show summary statistics", value=False, key="show_summary_stats"):
+                st.subheader("Summary Statistics")
+            
+                # Calculate statistics
+                stats_col1, stats_col2 = st.columns(2)
+            
+                with stats_col1:
+                    st.metric("Total Entries", len(filtered_df))
+                    st.metric("Date Range", f"{filtered_df['Date'].min().strftime('%Y-%m-%d')} to {filtered_df['Date'].max().strftime('%Y-%m-%d')}")
+            
+                with stats_col2:
+                    st.metric("Unique Investments", filtered_df['Investment'].nunique())
+                    st.metric("Currencies", ", ".join(filtered_df['Currency'].unique()))
+            
+                # Prepare summary stats by investment
+                investment_summary = filtered_df.groupby('Investment', observed=True).agg({
+                    'Value': ['count', 'min', 'max', 'mean'],
+                    'ValueUSD': ['min', 'max', 'mean', 'sum']
+                }).reset_index()
+            
+                # Flatten multi-level columns
+                investment_summary.columns = ['Investment', 'Count', 'Min', 'Max', 'Avg', 'Min (USD)', 'Max (USD)', 'Avg (USD)', 'Total (USD)']
+            
+                # Display summary; numbers are formatted by the table, not converted to text
+                st.dataframe(
+                    investment_summary,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        **{col: st.column_config.NumberColumn(col, format="%.2f")
+                           for col in ['Min', 'Max', 'Avg']},
+                        **{col: st.column_config.NumberColumn(col, format="$%.2f")
+                           for col in ['Min (USD)', 'Max (USD)', 'Avg (USD)', 'Total (USD)']},
+                    }
+                )
         
-        with export_options_col1:
-            export_format = st.radio(
-                "Export Format",
-                ["CSV", "Excel", "JSON"],
-                horizontal=True,
-                key="export_format"
-            )
+            # Download button with options
+            st.subheader("Export Data")
+            export_options_col1, export_options_col2 = st.columns(2)
         
-        with export_options_col2:
-            export_scope = st.radio(
-                "Export Scope",
-                ["Filtered Data", "Current Page", "All Data"],
-                horizontal=True,
-                key="export_scope"
-            )
+            with export_options_col1:
+                export_format = st.radio(
+                    "Export Format",
+                    ["CSV", "Excel", "JSON"],
+                    horizontal=True,
+                    key="export_format"
+                )
         
-        # Determine what to export
-        if export_scope == "Filtered Data":
-            export_df = filtered_df
-        elif export_scope == "Current Page":
-            export_df = display_df
-        else:  # All Data
-            export_df = df
-        
-        # Create export button based on format
-        if export_format == "CSV":
-            csv = export_df.to_csv(index=False)
-            st.download_button(
-                label="📥 Download Data",
-                data=csv,
-                file_name="investment_data_export.csv",
-                mime="text/csv"
-            )
-        elif export_format == "Excel":
-            # For Excel, we need to use BytesIO
-            from io import BytesIO
-            
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                export_df.to_excel(writer, sheet_name='Investment Data', index=False)
-                
-                # Auto-adjust column width
-                worksheet = writer.sheets['Investment Data']
-                for i, col in enumerate(export_df.columns):
-                    column_len = max(export_df[col].astype(str).str.len().max(), len(col) + 2)
-                    worksheet.set_column(i, i, column_len)
-            
-            excel_data = buffer.getvalue()
-            
-            st.download_button(
-                label="📥 Download Excel",
-                data=excel_data,
-                file_name="investment_data_export.xlsx",
-                mime="application/vnd.ms-excel"
-            )
-        else:  # JSON
-            json_str = export_df.to_json(orient='records', date_format='iso')
-            st.download_button(
-                label="📥 Download JSON",
-                data=json_str,
-                file_name="investment_data_export.json",
-                mime="application/json"
-            )
-    else:
-        st.info("No data available. Please add investment entries.")
-    st.markdown('</div>', unsafe_allow_html=True)
+            with export_options_col2:
+                export_scope = st.radio(
+                    "Export Scope",
+                    ["Filtered Data", "Current Page", "All Data"],
+                    horizontal=True,
+                    key="export_scope"
+                )
+        
+            # Determine what to export
+            if export_scope == "Filtered Data":
+                export_df = filtered_df.take(order)  # in the order shown
+            elif export_scope == "Current Page":
+                export_df = display_df
+            else:  # All Data
+                export_df = df
+        
+            # Create export button based on format
+            if export_format == "CSV":
+                _download_button(
+                    partial(export_df.to_csv, index=False),
+                    label="📥 Download Data",
+                    file_name="investment_data_export.csv",
+                    mime="text/csv"
+                )
+            elif export_format == "Excel":
+                _download_button(
+                    partial(dataframe_to_excel, export_df),
+                    label="📥 Download Excel",
+                    file_name="investment_data_export.xlsx",
+                    mime="application/vnd.ms-excel"
+                )
+            else:  # JSON
+                _download_button(
+                    partial(export_df.to_json, orient='records', date_format='iso'),
+                    label="📥 Download JSON",
+                    file_name="investment_data_export.json",
+                    mime="application/json"
+                )
+        else:
+            st.info("No data available. Please add investment entries.")
+        st.markdown('</div>', unsafe_allow_html=True)
     
     with tab4:
     # Settings tab with enhanced UI and animations
@@ -2055,42 +2146,25 @@ with tab3:
                 
                 # Create backup button based on format
                 if backup_format == "CSV":
-                    csv = df.to_csv(index=False)
-                    st.download_button(
+                    _download_button(
+                        partial(df.to_csv, index=False),
                         label="💾 Export All Data",
-                        data=csv,
                         file_name=f"{backup_name}.csv",
                         mime="text/csv",
                         key="export_all"
                     )
                 elif backup_format == "Excel":
-                    # For Excel, we need to use BytesIO
-                    from io import BytesIO
-                    
-                    buffer = BytesIO()
-                    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-                        df.to_excel(writer, sheet_name='Investment Data', index=False)
-                        
-                        # Auto-adjust column width
-                        worksheet = writer.sheets['Investment Data']
-                        for i, col in enumerate(df.columns):
-                            column_len = max(df[col].astype(str).str.len().max(), len(col) + 2)
-                            worksheet.set_column(i, i, column_len)
-                    
-                    excel_data = buffer.getvalue()
-                    
-                    st.download_button(
+                    _download_button(
+                        partial(dataframe_to_excel, df),
                         label="💾 Export All Data",
-                        data=excel_data,
                         file_name=f"{backup_name}.xlsx",
                         mime="application/vnd.ms-excel",
                         key="export_all_excel"
                     )
                 else:  # JSON
-                    json_str = df.to_json(orient='records', date_format='iso')
-                    st.download_button(
+                    _download_button(
+                        partial(df.to_json, orient='records', date_format='iso'),
                         label="💾 Export All Data",
-                        data=json_str,
                         file_name=f"{backup_name}.json",
                         mime="application/json",
                         key="export_all_json"
@@ -2120,8 +2194,13 @@ with tab3:
                     file_ext = uploaded_file.name.split('.')[-1].lower()
                     
                     if file_ext == 'csv':
-                        # Try to read CSV
-                        import_df = pd.read_csv(uploaded_file, header=None)
+                        # Parse the file once, without assuming a header row, and work out the
+                        # layout from the result (pyarrow's parser when available, as in load_data)
+                        try:
+                            import_df = pd.read_csv(uploaded_file, header=None, engine='pyarrow')
+                        except (ImportError, ValueError):
+                            uploaded_file.seek(0)
+                            import_df = pd.read_csv(uploaded_file, header=None)
                         
                         # Try to determine the format
                         if import_df.shape[1] == 4:
@@ -2136,46 +2215,39 @@ with tab3:
                             )
                             import_df = import_df[['Date', 'Investment', 'Currency', 'Value']]
                         else:
-                            # Try with header
-                            uploaded_file.seek(0)
-                            import_df = pd.read_csv(uploaded_file)
+                            # Otherwise the first row is the header - no second read of the file
+                            import_df.columns = import_df.iloc[0].astype(str).tolist()
+                            import_df = import_df.iloc[1:].reset_index(drop=True)
                     
                     elif file_ext == 'xlsx':
-                        # Read Excel file
-                        import_df = pd.read_excel(uploaded_file)
+                        # Read Excel file - with the Rust calamine reader when python-calamine
+                        # is installed (pandas 2.2+), otherwise with pandas' default read-only
+                        # openpyxl reader
+                        try:
+                            import_df = pd.read_excel(uploaded_file, engine='calamine')
+                        except (ImportError, ValueError):
+                            uploaded_file.seek(0)
+                            import_df = pd.read_excel(uploaded_file)
                     
                     else:  # JSON
-                        # Read JSON file
-                        import_df = pd.read_json(uploaded_file)
-                    
-                    # Process data types
-                    if 'Date' in import_df.columns:
-                        import_df['Date'] = pd.to_datetime(import_df['Date'], format='mixed', errors='coerce')
-                        import_df['Date'] = import_df['Date'].fillna(pd.Timestamp(datetime.now().date()))
-                    
-                    if 'Investment' in import_df.columns:
-                        import_df['Investment'] = import_df['Investment'].astype(str)
-                    
-                    if 'Currency' in import_df.columns:
-                        import_df['Currency'] = import_df['Currency'].astype(str)
-                        # Fix any missing currencies
-                        for idx, row in import_df.iterrows():
-                            if row['Currency'] == 'nan' or pd.isna(row['Currency']):
-                                inv = str(row['Investment'])
-                                import_df.at[idx, 'Currency'] = investment_accounts.get(inv, 'USD')
-                    
-                    if 'Value' in import_df.columns:
-                        import_df['Value'] = pd.to_numeric(import_df['Value'], errors='coerce')
-                        import_df = import_df.dropna(subset=['Value'])
+                        # Parse the payload in one call (with orjson when it is installed) and
+                        # build the frame from either a list of records or {column: {row: value}}
+                        try:
+                            import orjson # type: ignore
+                            raw = orjson.loads(uploaded_file.getvalue())
+                        except ImportError:
+                            raw = json.loads(uploaded_file.getvalue())
+                        if isinstance(raw, list):
+                            import_df = pd.DataFrame.from_records(raw)
+                        else:
+                            import_df = pd.DataFrame(raw)
                     
-                    # Preview imported data with animated loader
+                    # Preview imported data - only the previewed rows are converted here,
+                    # the whole file is converted once the import is confirmed
                     st.subheader("Preview Imported Data")
                     
-                    with st.spinner("Processing data..."):
-                        time.sleep(0.5)  # Short delay for animation
-                    
                     st.dataframe(
-                        import_df.head(5),
+                        _coerce_import(import_df.head(5)),
                         use_container_width=True
                     )
                     
@@ -2188,46 +2260,53 @@ with tab3:
                     
                     if st.button("✅ Confirm Import", key="confirm_import"):
                         with st.spinner("Processing import..."):
+                            # Progress follows the actual work: empty until the data is saved
                             progress_bar = st.progress(0)
-                            for i in range(101):
-                                progress_bar.progress(i)
-                                time.sleep(0.01)
+                            import_df = _coerce_import(import_df)
                         
                             if import_action == "Replace all data":
                                 save_data(import_df)
+                                progress_bar.progress(100)
+                                bump_data_version()
                                 st.success("Data replaced successfully!")
                                 st.session_state.show_success = True
                                 st.rerun()
                             elif import_action == "Append to existing data":
                                 combined_df = pd.concat([df, import_df], ignore_index=True)
-                                # Remove potential duplicates
-                                combined_df = combined_df.drop_duplicates(
-                                    subset=['Date', 'Investment', 'Currency', 'Value']
-                                )
+                                # Remove potential duplicates: one vectorized 64-bit hash per row,
+                                # keeping each row's first occurrence in its original order
+                                row_hash = pd.util.hash_pandas_object(
+                                    combined_df[['Date', 'Investment', 'Currency', 'Value']], index=False
+                                ).to_numpy()
+                                _, first_idx = np.unique(row_hash, return_index=True)
+                                combined_df = combined_df.iloc[np.sort(first_idx)]
                                 save_data(combined_df)
+                                progress_bar.progress(100)
+                                bump_data_version()
                                 st.success("Data appended successfully!")
                                 st.session_state.show_success = True
                                 st.rerun()
                             else:  # Update existing entries
-                                # For each row in import_df, update if it exists, append if not
-                                result_df = df.copy()
-                                
-                                for _, row in import_df.iterrows():
-                                    # Check if entry exists
-                                    mask = (
-                                        (result_df['Date'] == row['Date']) & 
-                                        (result_df['Investment'] == row['Investment'])
-                                    )
-                                    
-                                    if mask.any():
-                                        # Update existing entry
-                                        result_df.loc[mask, 'Value'] = row['Value']
-                                        result_df.loc[mask, 'Currency'] = row['Currency']
-                                    else:
-                                        # Append new entry
-                                        result_df = pd.concat([result_df, pd.DataFrame([row])], ignore_index=True)
+                                # Upsert on (Date, Investment) in one pass: matching rows take the
+                                # imported Value and Currency, new keys are appended once, and a key
+                                # imported more than once keeps its last row
+                                keys = ['Date', 'Investment']
+                                result_df = (
+                                    df[['Date', 'Investment', 'Currency', 'Value']]
+                                    .astype({'Investment': str, 'Currency': str})
+                                    .set_index(keys)
+                                )
+                                incoming = (
+                                    import_df.drop_duplicates(subset=keys, keep='last')
+                                    .set_index(keys)[['Currency', 'Value']]
+                                )
+                                result_df.update(incoming)
+                                new_keys = incoming.index.difference(result_df.index)
+                                result_df = pd.concat([result_df, incoming.loc[new_keys]]).reset_index()
                                 
                                 save_data(result_df)
+                                progress_bar.progress(100)
+                                bump_data_version()
                                 st.success("Data updated successfully!")
                                 st.session_state.show_success = True
                                 st.rerun()
@@ -2237,27 +2316,18 @@ with tab3:
     with settings_tab2:
         st.subheader("Investment Accounts and Categories")
         
-        # Display configured accounts with improved styling
-        accounts_df = pd.DataFrame({
-            'Investment': list(INVESTMENT_ACCOUNTS.keys()),
-            'Currency': list(INVESTMENT_ACCOUNTS.values()),
-            'Category': [INVESTMENT_CATEGORIES.get(inv, 'Uncategorized') for inv in INVESTMENT_ACCOUNTS.keys()]
-        })
+        # Display configured accounts with improved styling (already sorted by category and name)
+        accounts_df, accounts_lower = _accounts_table(tuple(INVESTMENT_ACCOUNTS.items()), tuple(INVESTMENT_CATEGORIES.items()))
         
-        # Allow filtering
+        # Allow filtering - against the cached lowercased columns, so only the query is case-folded
         filter_accounts = st.text_input("🔍 Filter accounts", key="account_filter")
         if filter_accounts:
-            accounts_df = accounts_df[
-                accounts_df.astype(str).apply(
-                    lambda row: row.str.contains(filter_accounts, case=False).any(), 
-                    axis=1
-                )
-            ]
+            accounts_df = accounts_df[_search_mask(accounts_lower, filter_accounts.lower(), case=True)]
         
         # Group by category for better presentation
         category_filter = st.multiselect(
             "Filter by Category",
-            ["All"] + sorted(set(accounts_df['Category'].tolist())),
+            ["All"] + accounts_df['Category'].cat.remove_unused_categories().cat.categories.tolist(),
             default=["All"],
             key="config_category_filter"
         )
@@ -2265,9 +2335,6 @@ with tab3:
         if "All" not in category_filter:
             accounts_df = accounts_df[accounts_df['Category'].isin(category_filter)]
         
-        # Sort by category and name
-        accounts_df = accounts_df.sort_values(['Category', 'Investment'])
-        
         st.dataframe(
             accounts_df,
             use_container_width=True,
@@ -2288,8 +2355,6 @@ with tab3:
         st.subheader("Exchange Rate Settings")
         
         # Load current exchange rates
-        from currency_service import get_all_rates, load_cache
-        
         cache = load_cache()
         
         # Display last update time
@@ -2298,13 +2363,8 @@ with tab3:
         
         # Display current rates
         if 'rates' in cache and cache['rates']:
-            rates_df = pd.DataFrame({
-                'Currency': list(cache['rates'].keys()),
-                'Rate to USD': list(cache['rates'].values())
-            })
-            
-            # Sort by currency
-            rates_df = rates_df.sort_values('Currency')
+            # Sorted by currency; rebuilt only when the rate cache is rewritten
+            rates_df = _rates_table(last_updated, tuple(cache['rates'].items()))
             
             st.dataframe(
                 rates_df,
@@ -2316,7 +2376,7 @@ with tab3:
             if st.button("🔄 Force Refresh Exchange Rates", key="force_refresh"):
                 with st.spinner("Refreshing exchange rates..."):
                     refresh_rates()
-                    time.sleep(0.5)  # Wait for refresh to complete
+                    bump_data_version()
                     st.success("Exchange rates refreshed successfully!")
                     st.rerun()
         else:
@@ -2325,7 +2385,7 @@ with tab3:
             if st.button("🔄 Fetch Exchange Rates", key="fetch_rates"):
                 with st.spinner("Fetching exchange rates..."):
                     refresh_rates()
-                    time.sleep(0.5)  # Wait for refresh to complete
+                    bump_data_version()
                     st.success("Exchange rates fetched successfully!")
                     st.rerun()
         
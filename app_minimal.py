@@ -26,46 +26,59 @@ except Exception as e:
 st.title("🧪 Minimal Investment Tracker Test")
 
 try:
+    import os
     import pandas as pd
-    from data_handler_db import load_data
+    from data_handler_db import load_data, get_date_range_db, DB_FILE
+    from currency_service import load_cache
     from datetime import datetime, timedelta
 
-    # Load data using proper data handler (handles column renaming)
-    df = load_data()
+    # Days covered by each time option (None = everything)
+    WINDOW_DAYS = {"1 Month": 30, "3 Months": 90, "6 Months": 180, "1 Year": 365, "All Time": None}
 
-    st.success(f"✅ Loaded {len(df)} records from database")
-    st.write(f"**Columns:** {list(df.columns)}")
+    def _db_mtime():
+        try:
+            return os.path.getmtime(DB_FILE)
+        except OSError:
+            return 0.0
 
-    # Calculate ValueUSD if not present
-    if 'ValueUSD' not in df.columns:
-        from currency_service import get_conversion_rate
-        df['ValueUSD'] = df.apply(lambda row: row['Value'] * get_conversion_rate(row['Currency']), axis=1)
+    # Reads are cached until the database file or the exchange rate cache changes
+    @st.cache_data(show_spinner=False)
+    def _date_range(mtime):
+        return get_date_range_db()
+
+    @st.cache_data(show_spinner=False)
+    def _load_window(mtime, rate_epoch, start_date):
+        return load_data(start_date=start_date)
 
     # Time range selector
     st.subheader("Select Time Range")
     time_option = st.radio(
         "Choose period:",
-        ["1 Month", "3 Months", "6 Months", "1 Year", "All Time"],
+        list(WINDOW_DAYS),
         horizontal=True
     )
 
     st.write(f"Selected: **{time_option}**")
 
-    # Filter data based on selection
-    end_date = df['Date'].max()
+    # Work out the window first so only its rows are read from the database
+    mtime = _db_mtime()
+    first_date, end_date = _date_range(mtime)
+    if end_date is None:
+        raise ValueError("No investment data in the database")
 
-    if time_option == "1 Month":
-        start_date = end_date - timedelta(days=30)
-    elif time_option == "3 Months":
-        start_date = end_date - timedelta(days=90)
-    elif time_option == "6 Months":
-        start_date = end_date - timedelta(days=180)
-    elif time_option == "1 Year":
-        start_date = end_date - timedelta(days=365)
-    else:
-        start_date = df['Date'].min()
+    days = WINDOW_DAYS[time_option]
+    start_date = first_date if days is None else end_date - timedelta(days=days)
 
-    filtered_df = df[(df['Date'] >= start_date) & (df['Date'] <= end_date)]
+    # Load data using proper data handler (handles column renaming)
+    filtered_df = _load_window(mtime, load_cache().get('timestamp', 0), start_date)
+
+    st.success(f"✅ Loaded {len(filtered_df)} records from database")
+    st.write(f"**Columns:** {list(filtered_df.columns)}")
+
+    # Calculate ValueUSD if not present
+    if 'ValueUSD' not in filtered_df.columns:
+        from currency_service import get_conversion_rate
+        filtered_df['ValueUSD'] = filtered_df.apply(lambda row: row['Value'] * get_conversion_rate(row['Currency']), axis=1)
 
     st.info(f"📊 Showing {len(filtered_df)} records from {start_date.date()} to {end_date.date()}")
 
@@ -74,7 +87,8 @@ try:
 
     # Try simple chart
     st.subheader("Simple Line Chart Test")
-    daily_totals = filtered_df.groupby('Date')['ValueUSD'].sum().reset_index()
+    # Rows come back ordered by date, so the groups are already in chart order
+    daily_totals = filtered_df.groupby('Date', sort=False)['ValueUSD'].sum().reset_index()
     st.line_chart(daily_totals.set_index('Date'))
     
     st.success("✅ All tests passed! No crashes!")
@@ -4,6 +4,7 @@ import time
 import json
 import os
 from datetime import datetime
+from functools import lru_cache
 
 # File to cache exchange rates
 CACHE_FILE = 'exchange_rates_cache.json'
@@ -25,6 +26,30 @@ except Exception:
     # If config can't be imported (e.g., during certain tests), fall back to defaults
     pass
 
+@lru_cache(maxsize=1)
+def _read_cache_file(path, mtime_ns):
+    """
+    Decode a cache file. Memoized on the file's modification time, so an
+    unchanged file is only decoded once.
+    
+    Args:
+        path (str): Cache file path
+        mtime_ns (int): Modification time of the file, used as cache key
+        
+    Returns:
+        dict: Cached exchange rates data
+    """
+    with open(path, 'r') as f:
+        cache = json.load(f)
+    # Files written before rates were stored sorted
+    if isinstance(cache, dict) and isinstance(cache.get('rates'), dict):
+        cache['rates'] = dict(sorted(cache['rates'].items()))
+    if isinstance(cache, dict):
+        cache.setdefault('rates', {})
+        cache.setdefault('timestamp', 0)
+        cache.setdefault('source', 'unknown')
+    return cache
+
 def load_cache():
     """
     Load exchange rates from cache file.
@@ -34,13 +59,9 @@ def load_cache():
     """
     try:
         if os.path.exists(CACHE_FILE):
-            with open(CACHE_FILE, 'r') as f:
-                cache = json.load(f)
-                if isinstance(cache, dict):
-                    cache.setdefault('rates', {})
-                    cache.setdefault('timestamp', 0)
-                    cache.setdefault('source', 'unknown')
-                return cache
+            cache = _read_cache_file(CACHE_FILE, os.stat(CACHE_FILE).st_mtime_ns)
+            # Shallow copy so callers can't modify the memoized cache
+            return dict(cache) if isinstance(cache, dict) else cache
         return {'rates': {}, 'timestamp': 0, 'source': 'unknown'}
     except Exception as e:
         print(f"Error loading cache: {e}")
@@ -49,15 +70,23 @@ def load_cache():
 def save_cache(cache):
     """
     Save exchange rates to cache file.
+    Rates are stored sorted by currency code so readers can display them in order.
     
     Args:
         cache (dict): Exchange rates data to cache
+
+    Returns:
+        bool: True if the cache was written, False otherwise
     """
     try:
+        cache = dict(cache, rates=dict(sorted(cache.get('rates', {}).items())))
         with open(CACHE_FILE, 'w') as f:
             json.dump(cache, f)
+        _read_cache_file.cache_clear()
+        return True
     except Exception as e:
         print(f"Error saving cache: {e}")
+        return False
 
 def fetch_exchange_rates(api_key):
     """
@@ -182,6 +211,7 @@ def get_conversion_rate(currency, api_key=None, cache_duration=DEFAULT_CACHE_DUR
 def refresh_rates(api_key=None):
     """
     Force refresh of exchange rates.
+    The call is synchronous: it returns only once the cache file has been written.
     
     Args:
         api_key (str, optional): API key for the exchange rates service
@@ -203,7 +233,8 @@ def refresh_rates(api_key=None):
                 'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S') if not is_demo else 'Demo rates - set API key',
                 'source': 'demo' if is_demo else 'api'
             }
-            save_cache(cache)
+            if not save_cache(cache):
+                return False
             # Return True for demo data only if no API key is configured
             return not is_demo or not api_key
 
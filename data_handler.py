@@ -17,7 +17,13 @@ def load_data(filepath='investment_data.csv'):
     try:
         # First, try to load the CSV as a standard format
         try:
-            df = pd.read_csv(filepath)
+            # pyarrow (installed with Streamlit) parses on multiple threads; Date stays text
+            # so it goes through the same to_datetime call below. Use the default parser if
+            # pyarrow is missing or rejects the file
+            try:
+                df = pd.read_csv(filepath, engine='pyarrow', dtype={'Date': str})
+            except (ImportError, ValueError):
+                df = pd.read_csv(filepath)
             
             # Check if this is our expected app format with proper column names
             expected_columns = set(['Date', 'Investment', 'Currency', 'Value'])
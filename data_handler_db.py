@@ -2,8 +2,9 @@
 import pandas as pd # type: ignore
 import sqlite3
 import os
+import time
 from datetime import datetime
-from currency_service import get_conversion_rate
+from currency_service import get_conversion_rate, load_cache, DEFAULT_CACHE_DURATION
 from config import INVESTMENT_ACCOUNTS, REVOLUT_EUR_ACCOUNT, INCLUDE_REVOLUT_IN_INCOME
 
 
@@ -48,17 +49,138 @@ def create_tables():
     )
     ''')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_sustainability_date ON sustainability_daily(date)')
+
+    _ensure_value_usd_schema(cursor)
     
     conn.commit()
     conn.close()
 
+def _ensure_value_usd_schema(cursor):
+    """
+    Create the rates table and the materialized value_usd column.
+    A trigger keeps value_usd in sync when a row's value/currency changes; inserted rows
+    start without one and are filled in by the refresh pass in load_data().
+    """
+    # Conversion rate to USD per currency, as used for value_usd
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS rates (
+        currency TEXT PRIMARY KEY,
+        rate REAL NOT NULL,
+        updated_at REAL NOT NULL DEFAULT 0
+    )
+    ''')
+
+    # Add value_usd to databases created before the column existed
+    columns = [col[1] for col in cursor.execute("PRAGMA table_info(investments)").fetchall()]
+    if 'value_usd' not in columns:
+        cursor.execute("ALTER TABLE investments ADD COLUMN value_usd REAL")
+
+    # Index for grouped queries by date and currency
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_investments_date_currency ON investments(date, currency)')
+
+    # A per-row UPDATE on every INSERT would double the cost of bulk saves and imports
+    cursor.execute('DROP TRIGGER IF EXISTS trg_investments_value_usd_insert')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_investments_value_usd_update
+    AFTER UPDATE OF value, currency ON investments
+    BEGIN
+        UPDATE investments
+        SET value_usd = NEW.value * (SELECT rate FROM rates WHERE rates.currency = NEW.currency)
+        WHERE id = NEW.id;
+    END
+    ''')
+
+def refresh_value_usd(conn=None, missing_only=False):
+    """
+    Store the current conversion rate of every currency in the rates table and
+    recompute value_usd for all investments with a single UPDATE.
+    Call this after the exchange rates have been refreshed.
+
+    Args:
+        conn (sqlite3.Connection, optional): Open connection to reuse
+        missing_only (bool): The stored rates are still current - only look up
+                             currencies without one and fill rows without a USD value
+
+    Returns:
+        bool: True if the update succeeded, False otherwise
+    """
+    own_conn = conn is None
+    try:
+        if own_conn:
+            create_tables()
+            conn = sqlite3.connect(DB_FILE)
+        cursor = conn.cursor()
+
+        query = "SELECT DISTINCT currency FROM investments"
+        if missing_only:
+            query += " WHERE currency NOT IN (SELECT currency FROM rates)"
+        currencies = [row[0] for row in cursor.execute(query).fetchall()]
+        # One lookup per currency, not per row
+        rates = [(currency, get_conversion_rate(currency)) for currency in currencies]
+        updated_at = load_cache().get('timestamp', 0)
+
+        cursor.executemany(
+            'INSERT OR REPLACE INTO rates (currency, rate, updated_at) VALUES (?, ?, ?)',
+            [(currency, rate, updated_at) for currency, rate in rates]
+        )
+        update = '''
+        UPDATE investments
+        SET value_usd = value * (SELECT rate FROM rates WHERE rates.currency = investments.currency)
+        '''
+        if missing_only:
+            update += "WHERE value_usd IS NULL"
+        cursor.execute(update)
+        conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error refreshing USD values in database: {e}")
+        return False
+    finally:
+        if own_conn and conn is not None:
+            conn.close()
+
+def _value_usd_is_missing(conn):
+    """Check whether any rows were saved without a USD value since the last refresh."""
+    return conn.execute("SELECT 1 FROM investments WHERE value_usd IS NULL LIMIT 1").fetchone() is not None
+
+def _value_usd_is_stale(conn):
+    """
+    Check whether every value_usd needs recomputing: stored rates older than the
+    exchange rates cache, or a cache past its lifetime (refresh_value_usd then
+    refetches the rates through get_conversion_rate).
+    """
+    cursor = conn.cursor()
+    cache_timestamp = load_cache().get('timestamp', 0)
+    if time.time() - cache_timestamp >= DEFAULT_CACHE_DURATION:
+        return True
+    oldest_rate = cursor.execute("SELECT MIN(updated_at) FROM rates").fetchone()[0]
+    if oldest_rate is None:
+        return False
+    return oldest_rate < cache_timestamp
+
 # data_handler_db.py (Part 2: Basic Data Loading & Saving)
-def load_data(filepath=None):
+def _tune_read_connection(conn):
+    """Memory-map the database file and enlarge the page cache for bulk reads."""
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+
+def _tune_write_connection(conn):
+    """
+    NORMAL sync for a bulk write on this connection. The rollback journal is kept (and
+    restored on a database left in WAL mode), so every commit lands in the single .db
+    file that auto-sync pushes.
+    """
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+def load_data(filepath=None, start_date=None):
     """
     Load investment data from SQLite database.
     
     Args:
         filepath (str): Not used, kept for compatibility with original function
+        start_date (datetime, optional): Only load rows on or after this date.
+                                         If None, all rows are loaded.
         
     Returns:
         pandas.DataFrame: DataFrame containing investment data
@@ -69,14 +191,30 @@ def load_data(filepath=None):
         
         # Connect to database
         conn = sqlite3.connect(DB_FILE)
+        _tune_read_connection(conn)
+
+        # Recompute every materialized USD value only when the rates changed or expired;
+        # rows saved since the last refresh are filled in on their own
+        if _value_usd_is_stale(conn):
+            refresh_value_usd(conn)
+        elif _value_usd_is_missing(conn):
+            refresh_value_usd(conn, missing_only=True)
         
-        # Load all data from investments table
-        query = "SELECT date, investment, currency, value FROM investments"
-        df = pd.read_sql_query(query, conn, parse_dates=['date'])
+        # Load data from investments table
+        # Ordered by date (indexed) so callers can binary-search the Date column
+        query = "SELECT date, investment, currency, value, value_usd FROM investments"
+        params = ()
+        if start_date is not None:
+            # Dates are stored as YYYY-MM-DD text, so the window filter runs on the date index
+            query += " WHERE date >= ?"
+            params = (pd.Timestamp(start_date).strftime('%Y-%m-%d'),)
+        query += " ORDER BY date"
+        df = pd.read_sql_query(query, conn, params=params, parse_dates=['date'])
         
         # Rename columns to match original CSV format
         df.rename(columns={'date': 'Date', 'investment': 'Investment', 
-                          'currency': 'Currency', 'value': 'Value'}, inplace=True)
+                          'currency': 'Currency', 'value': 'Value',
+                          'value_usd': 'ValueUSD'}, inplace=True)
         
         conn.close()
         
@@ -89,6 +227,27 @@ def load_data(filepath=None):
         print(f"Error loading data from database: {e}")
         return pd.DataFrame(columns=['Date', 'Investment', 'Currency', 'Value'])
 
+def get_date_range_db():
+    """
+    Get the earliest and latest dates stored in the database.
+    
+    Returns:
+        tuple: (earliest, latest) as pandas Timestamps, or (None, None) if there is no data
+    """
+    try:
+        create_tables()
+        conn = sqlite3.connect(DB_FILE)
+        _tune_read_connection(conn)
+        earliest, latest = conn.execute("SELECT MIN(date), MAX(date) FROM investments").fetchone()
+        conn.close()
+        
+        if latest is None:
+            return None, None
+        return pd.Timestamp(earliest), pd.Timestamp(latest)
+    except Exception as e:
+        print(f"Error getting date range from database: {e}")
+        return None, None
+
 def save_data(df, filepath=None):
     """
     Save investment data to SQLite database. This function REPLACES all existing data.
@@ -106,6 +265,7 @@ def save_data(df, filepath=None):
 
         # Connect to database
         conn = sqlite3.connect(DB_FILE)
+        _tune_write_connection(conn)
         cursor = conn.cursor()
 
         # Begin transaction for faster bulk operations
@@ -147,15 +307,12 @@ def save_data(df, filepath=None):
         # Clear existing data using DELETE with index optimization
         cursor.execute("DELETE FROM investments")
 
-        # Convert DataFrame to list of tuples for bulk insertion
-        # This is much faster than iterating row by row
-        data_tuples = list(df_to_save.itertuples(index=False, name=None))
-
-        # Insert data using executemany for efficiency
+        # Insert data using executemany for efficiency, streaming the rows as plain
+        # tuples rather than materializing them in a list first
         cursor.executemany('''
         INSERT INTO investments (date, investment, currency, value)
         VALUES (?, ?, ?, ?)
-        ''', data_tuples)
+        ''', df_to_save.itertuples(index=False, name=None))
 
         # Commit the transaction
         conn.commit()
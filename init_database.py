@@ -51,6 +51,9 @@ def init_database_from_snapshot():
 
         # Create database with proper schema
         conn = sqlite3.connect(DB_FILE)
+        # NORMAL sync for this connection: fewer fsyncs for the whole import. The
+        # rollback journal is kept, so every commit lands in the single synced .db file
+        conn.execute('PRAGMA synchronous=NORMAL')
         cursor = conn.cursor()
 
         # Create investments table with correct schema (lowercase columns)
@@ -115,42 +118,40 @@ def init_database_from_snapshot():
                 continue
 
             # Handle table-specific imports with column name mapping
+            # Rows are batched with executemany inside the single import transaction
             if table_name == 'investments':
-                for row in rows:
-                    # Map capitalized JSON keys to lowercase DB columns
-                    date_val = row.get('Date') or row.get('date')
-                    investment_val = row.get('Investment') or row.get('investment')
-                    currency_val = row.get('Currency') or row.get('currency')
-                    value_val = row.get('Value') or row.get('value')
-
-                    if date_val and investment_val:  # Only insert if required fields exist
-                        cursor.execute(
-                            'INSERT OR IGNORE INTO investments (date, investment, currency, value) VALUES (?, ?, ?, ?)',
-                            (date_val, investment_val, currency_val, value_val)
-                        )
+                # Map capitalized JSON keys to lowercase DB columns
+                investment_rows = (
+                    (row.get('Date') or row.get('date'),
+                     row.get('Investment') or row.get('investment'),
+                     row.get('Currency') or row.get('currency'),
+                     row.get('Value') or row.get('value'))
+                    for row in rows
+                )
+                cursor.executemany(
+                    'INSERT OR IGNORE INTO investments (date, investment, currency, value) VALUES (?, ?, ?, ?)',
+                    # Only insert if required fields exist
+                    (values for values in investment_rows if values[0] and values[1])
+                )
 
             elif table_name == 'sustainability_daily':
-                for row in rows:
-                    date_val = row.get('date')
-                    if date_val:
-                        cursor.execute(
-                            '''INSERT OR REPLACE INTO sustainability_daily
-                               (date, total_income_usd, total_expenses_usd, delta_usd)
-                               VALUES (?, ?, ?, ?)''',
-                            (date_val, row.get('total_income_usd', 0),
-                             row.get('total_expenses_usd', 0), row.get('delta_usd', 0))
-                        )
+                cursor.executemany(
+                    '''INSERT OR REPLACE INTO sustainability_daily
+                       (date, total_income_usd, total_expenses_usd, delta_usd)
+                       VALUES (?, ?, ?, ?)''',
+                    ((row.get('date'), row.get('total_income_usd', 0),
+                      row.get('total_expenses_usd', 0), row.get('delta_usd', 0))
+                     for row in rows if row.get('date'))
+                )
 
             elif table_name == 'expenses':
-                for row in rows:
-                    date_val = row.get('date')
-                    if date_val:
-                        cursor.execute(
-                            '''INSERT INTO expenses (date, category, description, amount, currency)
-                               VALUES (?, ?, ?, ?, ?)''',
-                            (date_val, row.get('category', ''), row.get('description', ''),
-                             row.get('amount', 0), row.get('currency', 'USD'))
-                        )
+                cursor.executemany(
+                    '''INSERT INTO expenses (date, category, description, amount, currency)
+                       VALUES (?, ?, ?, ?, ?)''',
+                    ((row.get('date'), row.get('category', ''), row.get('description', ''),
+                      row.get('amount', 0), row.get('currency', 'USD'))
+                     for row in rows if row.get('date'))
+                )
 
             sys.stderr.write(f"  ✅ Imported {len(rows)} rows into {table_name}\n")
             sys.stderr.flush()
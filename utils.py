@@ -1,6 +1,7 @@
 # utils.py
 import streamlit as st # type: ignore
 import pandas as pd # type: ignore
+import numpy as np # type: ignore
 import time
 import re
 import base64
@@ -358,6 +359,34 @@ def apply_chart_styling(fig, height=400, x_title="Date", y_title="Value",
 
     return fig
 
+# Function to build an Excel workbook in memory
+def dataframe_to_excel(df, sheet_name='Investment Data', sample_rows=1000):
+    """
+    Write a DataFrame to an in-memory .xlsx workbook. Column widths are
+    fitted to the header and the first sample_rows values, so sizing the
+    columns does not convert every cell to a string.
+    
+    Parameters:
+        df (pandas.DataFrame): The data to write
+        sheet_name (str): Name of the worksheet
+        sample_rows (int): Number of leading rows used to size the columns
+        
+    Returns:
+        bytes: The workbook contents
+    """
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+        
+        # Auto-adjust column width
+        worksheet = writer.sheets[sheet_name]
+        sample = df.head(sample_rows)
+        for i, col in enumerate(df.columns):
+            longest = sample[col].astype(str).str.len().max() if len(sample) else 0
+            worksheet.set_column(i, i, max(longest, len(col) + 2))
+    
+    return buffer.getvalue()
+
 # Function to create export buttons based on format and data
 def create_export_buttons(export_df, export_format, filename_prefix="investment_data", button_label=None, icon=None):
     """
@@ -389,18 +418,7 @@ def create_export_buttons(export_df, export_format, filename_prefix="investment_
             use_container_width=True
         )
     elif export_format == "Excel":
-        # For Excel, we need to use BytesIO
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-            export_df.to_excel(writer, sheet_name='Investment Data', index=False)
-            
-            # Auto-adjust column width
-            worksheet = writer.sheets['Investment Data']
-            for i, col in enumerate(export_df.columns):
-                column_len = max(export_df[col].astype(str).str.len().max(), len(col) + 2)
-                worksheet.set_column(i, i, column_len)
-        
-        excel_data = buffer.getvalue()
+        excel_data = dataframe_to_excel(export_df)
         
         st.download_button(
             label=button_label,
@@ -455,6 +473,79 @@ def get_date_range(preset_range, latest_date, earliest_date):
     
     return start_date, end_date
 
+# Function to select a date range from a dataframe
+def filter_date_range(df, start_date, end_date):
+    """
+    Select the rows of a DataFrame whose Date falls within a range (inclusive).
+    Both bounds are converted to datetime64 once and located by binary search
+    on the sorted Date column, instead of comparing every row twice.
+    
+    Parameters:
+        df (pandas.DataFrame): DataFrame with a datetime 'Date' column
+        start_date: Start of the range (date, datetime, Timestamp or datetime64)
+        end_date: End of the range (date, datetime, Timestamp or datetime64)
+        
+    Returns:
+        pandas.DataFrame: Rows within the range, ordered by Date
+    """
+    if not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='mergesort')
+    
+    dates = df['Date'].to_numpy()
+    start, end = np.array(
+        [pd.Timestamp(start_date).to_datetime64(), pd.Timestamp(end_date).to_datetime64()]
+    ).astype(dates.dtype)
+    start_idx = np.searchsorted(dates, start, side='left')
+    end_idx = np.searchsorted(dates, end, side='right')
+    
+    return df.iloc[start_idx:end_idx]
+
+def downsample_lttb(df, x_col, y_col, max_points=2000):
+    """
+    Reduce a time series to at most max_points rows with the
+    Largest-Triangle-Three-Buckets algorithm, which keeps the points that
+    define the visible shape of the line. Short series are returned unchanged.
+    
+    Parameters:
+        df (pandas.DataFrame): DataFrame sorted by x_col
+        x_col (str): Column for the x axis (numeric or datetime)
+        y_col (str): Numeric column for the y axis
+        max_points (int): Maximum number of rows to keep (at least 3)
+        
+    Returns:
+        pandas.DataFrame: The selected rows of df, in their original order
+    """
+    n = len(df)
+    if n <= max_points or max_points < 3:
+        return df
+    
+    x = df[x_col].to_numpy()
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype('datetime64[ns]').astype(np.int64)
+    x = x.astype(float)
+    y = df[y_col].to_numpy(dtype=float)
+    
+    # First and last points are always kept; the rest is split into equal buckets
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    keep = np.empty(max_points, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    prev = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev])
+            - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(area))
+        keep[i + 1] = prev
+    
+    return df.iloc[keep]
+
 # Function to filter dataframe by date and investments
 def filter_dataframe(df, start_date, end_date, investment_filter="All"):
     """
@@ -469,13 +560,8 @@ def filter_dataframe(df, start_date, end_date, investment_filter="All"):
     Returns:
         pandas.DataFrame: Filtered DataFrame
     """
-    filtered_df = df.copy()
-    
-    # Date filter
-    filtered_df = filtered_df[
-        (filtered_df['Date'] >= pd.Timestamp(start_date)) &
-        (filtered_df['Date'] <= pd.Timestamp(end_date))
-    ]
+    # Date filter - copy only the selected rows
+    filtered_df = filter_date_range(df, start_date, end_date).copy()
     
     # Investment filter
     if investment_filter != "All" and not isinstance(investment_filter, list) or \